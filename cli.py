@@ -0,0 +1,161 @@
+# cli.py
+"""
+    Headless batch renderer: renders text files to audio without starting the GUI.
+
+        python cli.py chapter1.txt chapter2.txt --language "British English" --voice bf_emma --output-dir out
+
+    The engine is loaded once and reused for every file. Needs the same packages and model files as
+    the GUI (run the GUI once to install/download them). Nothing in here imports Qt.
+"""
+import os
+import sys
+import time
+import argparse
+import builtins
+import multiprocessing
+
+from core.engine_loader import add_bundled_libs_to_path, add_external_packages_to_sys_path, add_external_packages_to_dll_path, load_engine
+from core.renderer import ChunkRenderer, LANGUAGE_MAPPING
+from core.synthesis_cache import get_synthesis_cache
+from core.g2p_cache import get_g2p_cache
+from core.render_pool import shutdown_worker_pool
+from core.model_variants import MODEL_VARIANTS, DEFAULT_VARIANT, get_variant_engine
+from core.audio_io import ENCODER_DEFAULTS, BITRATE_SETTING_RANGE, QUALITY_RANGE
+
+DEFAULT_VOICE = 'af_heart'
+DEFAULT_FORMAT = 'wav'
+SYNTHESIS_CACHE_MB = 512
+
+
+def clamped_int(low, high):
+    """argparse type: an int, brought into [low, high] like the spinboxes of the settings dialog do."""
+    return lambda value: min(max(int(value), low), high)
+
+
+def output_path_for(input_file, output_dir, audio_format):
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_dir or os.path.dirname(os.path.abspath(input_file)), f"{base}.{audio_format}")
+
+
+def render_files(files, language='American English', voice=DEFAULT_VOICE, speed=1.0, blend_voice=None, blend_balance=None,
+                 output_dir=None, audio_format=DEFAULT_FORMAT, workers=None, use_cache=True, batch_inference=False, model_variant=DEFAULT_VARIANT,
+                 encoder_settings=None, verbose=False):
+    """
+        Renders each text file to an audio file. Returns a list of (input file, output file or None, message).
+        A file that can't be read is reported and skipped, the others are still rendered.
+        Loads the engine into builtins if it isn't there yet.
+    """
+    if not hasattr(builtins, 'kokoro_instance'):
+        add_bundled_libs_to_path()
+        add_external_packages_to_sys_path(report=print if verbose else (lambda msg: None))
+        add_external_packages_to_dll_path(report=print if verbose else (lambda msg: None))
+        load_engine(report=print if verbose else (lambda msg: None))
+
+    kokoro, model_path = get_variant_engine(model_variant)
+    synthesis_cache = get_synthesis_cache(SYNTHESIS_CACHE_MB) if use_cache else None
+    g2p_cache = get_g2p_cache(persistent=use_cache) if use_cache else None
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    results = []
+    for input_file in files:
+        try:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                text = f.read().strip()
+        except (OSError, UnicodeDecodeError) as e:
+            message = f"Can't read the file: {e}"
+            print(f"{input_file}: {message}")
+            results.append((input_file, None, message))
+            continue
+        if not text:
+            print(f"{input_file}: empty, skipped.")
+            results.append((input_file, None, "Empty file."))
+            continue
+
+        output_file = output_path_for(input_file, output_dir, audio_format)
+        renderer = ChunkRenderer(
+            text, voice, speed, language, kokoro, output_file,
+            blend_voice=blend_voice,
+            blend_balance=blend_balance,
+            workers=workers,
+            synthesis_cache=synthesis_cache,
+            g2p_cache=g2p_cache,
+            batch_inference=batch_inference,
+            model_path=model_path,
+            encoder_settings=encoder_settings,
+            on_output=print if verbose else None
+        )
+
+        start = time.perf_counter()
+        message, fused_file = renderer.run()
+        elapsed = time.perf_counter() - start
+
+        if not fused_file:
+            print(f"{input_file}: {message}")
+            results.append((input_file, None, message))
+            continue
+
+        audio_seconds = renderer.audio_seconds
+        rtf = elapsed / audio_seconds if audio_seconds else 0.0
+        print(f"{input_file} -> {fused_file}: {len(renderer.chunks)} chunks, {audio_seconds:.1f}s of audio in {elapsed:.1f}s (RTF {rtf:.3f})")
+        results.append((input_file, fused_file, message))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render text files to speech without the GUI.")
+    parser.add_argument('files', nargs='+', help="UTF-8 text files to render")
+    parser.add_argument('--language', default='American English', choices=list(LANGUAGE_MAPPING))
+    parser.add_argument('--voice', default=DEFAULT_VOICE)
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--blend-voice', default=None, help="second voice to blend with --voice")
+    parser.add_argument('--blend-balance', type=int, default=50, help="percent of the blend voice (0-100)")
+    parser.add_argument('--output-dir', default=None, help="defaults to the folder of each input file")
+    parser.add_argument('--format', default=DEFAULT_FORMAT, help="output file extension, anything soundfile can write (wav, flac, opus, ogg, mp3...)")
+    parser.add_argument('--bitrate', type=clamped_int(*BITRATE_SETTING_RANGE), default=None,
+                        help=f"Opus/MP3 bitrate in kbps, {BITRATE_SETTING_RANGE[0]}-{BITRATE_SETTING_RANGE[1]} (constant bitrate); without it the encoder aims for --quality")
+    parser.add_argument('--quality', type=clamped_int(*QUALITY_RANGE), default=ENCODER_DEFAULTS["quality"],
+                        help=f"Opus/MP3 variable bitrate quality, {QUALITY_RANGE[0]}-{QUALITY_RANGE[1]}")
+    parser.add_argument('--flac-compression', type=int, default=ENCODER_DEFAULTS["flac_compression"], help="FLAC compression level, 0-8")
+    parser.add_argument('--workers', type=int, default=None, help="render on N worker processes (0 = one per CPU)")
+    parser.add_argument('--model', default=DEFAULT_VARIANT, choices=list(MODEL_VARIANTS), help="model variant (the file has to be in models/kokoro)")
+    parser.add_argument('--batch', action='store_true', help="stack chunks of similar length into one inference run")
+    parser.add_argument('--no-cache', action='store_true', help="don't read or write the synthesis and G2P caches")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    try:
+        results = render_files(
+            args.files,
+            language=args.language,
+            voice=args.voice,
+            speed=args.speed,
+            blend_voice=args.blend_voice,
+            blend_balance=args.blend_balance if args.blend_voice else None,
+            output_dir=args.output_dir,
+            audio_format=args.format.lstrip('.').lower(),
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            batch_inference=args.batch,
+            model_variant=args.model,
+            encoder_settings={
+                "bitrate_mode": 'constant' if args.bitrate else 'variable',
+                "bitrate": args.bitrate or ENCODER_DEFAULTS["bitrate"],
+                "quality": args.quality,
+                "flac_compression": args.flac_compression,
+            },
+            verbose=args.verbose
+        )
+    finally:
+        shutdown_worker_pool()
+
+    failed = [input_file for input_file, output, _ in results if not output]
+    if failed:
+        print(f"{len(failed)} of {len(results)} files failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# audio_io.py
+"""
+    Audio file helpers for the render path, built on the soundfile module the loader puts in builtins.
+
+    FLAC, Opus (in Ogg), Vorbis and MP3 are encoded by libsndfile while the file is being written, so a
+    compressed output costs no extra pass at the end. BackgroundAudioWriter moves the encoding to its
+    own thread, so it overlaps with the inference of the next chunks instead of holding up the pipeline.
+"""
+import os
+import time
+import queue
+import builtins
+import threading
+
+# extension -> (soundfile format, subtype); the others use the format named like the extension and its default subtype
+ENCODINGS = {
+    'OPUS': ('OGG', 'OPUS'),
+    'OGG': ('OGG', 'VORBIS'),
+    'MP3': ('MP3', 'MPEG_LAYER_III'),
+    'FLAC': ('FLAC', 'PCM_16'),
+}
+LOSSY_SUBTYPES = ('OPUS', 'VORBIS', 'MPEG_LAYER_III')
+# Bitrates libsndfile spreads its compression level over (kbps, mono), used to turn a bitrate into a level.
+# Kokoro renders at 24 kHz, which makes MP3 an MPEG-2 Layer III stream: libmp3lame goes from 8 to 160 kbps there.
+BITRATE_RANGES = {
+    'OPUS': (6, 256),
+    'VORBIS': (32, 256),
+    'MPEG_LAYER_III': (8, 160),
+}
+# What the bitrate setting allows, the span both Opus and MP3 can do
+BITRATE_SETTING_RANGE = (8, 160)
+QUALITY_RANGE = (0, 10)
+# Opus only takes a bitrate; the variable mode spreads its quality over this (kbps, plenty for mono speech)
+OPUS_QUALITY_BITRATES = (12, 64)
+# libsndfile refuses a compression level of 1.0 for MP3
+MAX_COMPRESSION_LEVEL = 0.99
+BITRATE_MODES = ('variable', 'constant', 'average')
+ENCODER_DEFAULTS = {
+    "bitrate_mode": 'variable',
+    "bitrate": 96, # kbps, with the constant and average modes
+    "quality": 7, # 0-10, with the variable mode
+    "flac_compression": 5, # 0-8, FLAC is lossless: higher is smaller and slower
+}
+ENCODER_QUEUE_SIZE = 8 # chunks waiting for the background encoder before the render has to wait for it
+
+
+def soundfile_format(path):
+    """Returns the soundfile format name for the file extension, or None if soundfile can't write it."""
+    ext = os.path.splitext(path)[1].lstrip('.').upper()
+    if not ext:
+        return None
+    audio_format = ENCODINGS.get(ext, (ext, None))[0]
+    try:
+        available = builtins.sf.available_formats()
+    except Exception:
+        return None
+    return audio_format if audio_format in available else None
+
+
+def encoder_options(path, settings=None):
+    """
+        subtype, compression_level and bitrate_mode for the soundfile writer of path.
+        settings holds the ENCODER_DEFAULTS keys; only what applies to the file's format is returned.
+    """
+    settings = dict(ENCODER_DEFAULTS, **(settings or {}))
+    ext = os.path.splitext(path)[1].lstrip('.').upper()
+    subtype = ENCODINGS.get(ext, (None, None))[1]
+    if subtype == 'PCM_16':
+        level = min(max(int(settings["flac_compression"]), 0), 8)
+        return {"subtype": subtype, "compression_level": level / 8}
+    if subtype not in LOSSY_SUBTYPES:
+        return {"subtype": subtype} if subtype else {}
+
+    # libsndfile's compression level goes from 0 (best quality, highest bitrate) to 1 (smallest file)
+    bitrate_mode = settings["bitrate_mode"] if settings["bitrate_mode"] in BITRATE_MODES else 'variable'
+    quality = min(max(float(settings["quality"]), QUALITY_RANGE[0]), QUALITY_RANGE[1]) / QUALITY_RANGE[1]
+    if bitrate_mode == 'variable' and subtype != 'OPUS':
+        level = 1 - quality
+    else:
+        if bitrate_mode == 'variable':
+            bitrate = OPUS_QUALITY_BITRATES[0] + quality * (OPUS_QUALITY_BITRATES[1] - OPUS_QUALITY_BITRATES[0])
+        else:
+            bitrate = float(settings["bitrate"])
+        low, high = BITRATE_RANGES[subtype]
+        level = (high - min(max(bitrate, low), high)) / (high - low)
+    options = {"subtype": subtype, "compression_level": min(level, MAX_COMPRESSION_LEVEL)}
+    if subtype == 'MPEG_LAYER_III':
+        options["bitrate_mode"] = bitrate_mode.upper() # only MP3 lets you pick, Opus and Vorbis are always variable
+    return options
+
+
+class StreamingAudioWriter:
+    """
+        Appends chunks to the output file as they are rendered.
+
+        Audio goes to a ".partial" file next to the output, which replaces the output on close(),
+        so a cancelled or failed render never leaves a half-written file (or clobbers the old one).
+        The file is opened on the first chunk, when the sample rate is known.
+    """
+
+    def __init__(self, path, channels=1, subtype=None, compression_level=None, bitrate_mode=None):
+        self.path = path
+        self.format = soundfile_format(path)
+        if self.format is None:
+            raise ValueError(f"soundfile can't write '{os.path.splitext(path)[1]}' files.")
+        self.channels = channels
+        self.subtype = subtype
+        # Encoder settings, see encoder_options(); soundfile only accepts them for the compressed formats
+        self.encoder_settings = {key: value for key, value in (("compression_level", compression_level), ("bitrate_mode", bitrate_mode)) if value is not None}
+
+        base, ext = os.path.splitext(path)
+        self.partial_path = f"{base}.partial{ext}"
+        self.sound_file = None
+        self.sample_rate = None
+        self.frames_written = 0
+
+    @staticmethod
+    def supports(path):
+        return soundfile_format(path) is not None
+
+    def write(self, samples, sample_rate):
+        self._check_sample_rate(sample_rate)
+        self._write_to_file(samples)
+        self.frames_written += len(samples)
+
+    def _check_sample_rate(self, sample_rate):
+        if self.sample_rate is None:
+            self.sample_rate = sample_rate
+        elif sample_rate != self.sample_rate:
+            raise ValueError(f"Sample rate mismatch. Expected {self.sample_rate}, got {sample_rate}.")
+
+    def _write_to_file(self, samples):
+        if self.sound_file is None:
+            self.sound_file = builtins.sf.SoundFile(
+                self.partial_path, mode='w', samplerate=self.sample_rate, channels=self.channels,
+                subtype=self.subtype, format=self.format, **self.encoder_settings
+            )
+        self.sound_file.write(samples)
+
+    def close(self):
+        """Finalizes the header and moves the finished file into place."""
+        if self.sound_file is None:
+            raise ValueError("No audio was written.")
+        self.sound_file.close()
+        self.sound_file = None
+        os.replace(self.partial_path, self.path)
+        return self.path
+
+    def abort(self):
+        """Drops everything written so far."""
+        if self.sound_file is not None:
+            try:
+                self.sound_file.close()
+            except Exception:
+                pass
+            self.sound_file = None
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+
+class BackgroundAudioWriter(StreamingAudioWriter):
+    """
+        StreamingAudioWriter that encodes on its own thread. write() only queues the chunk; an encoding
+        error comes back from the next write() or from close(). frames_written counts queued frames.
+        on_encoded(tag, seconds) is called on the encoder thread once the chunk written with that tag is
+        in the file, and drain_seconds is how long close() waited for the encoder to catch up.
+    """
+
+    def __init__(self, path, channels=1, subtype=None, compression_level=None, bitrate_mode=None, on_encoded=None):
+        super().__init__(path, channels, subtype, compression_level, bitrate_mode)
+        self.on_encoded = on_encoded
+        self.drain_seconds = 0.0
+        self._queue = queue.Queue(maxsize=ENCODER_QUEUE_SIZE)
+        self._error = None
+        self._thread = None
+
+    def write(self, samples, sample_rate, tag=None):
+        self._raise_error()
+        self._check_sample_rate(sample_rate)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._encode, name="render-encoder", daemon=True)
+            self._thread.start()
+        self._queue.put((samples, tag))
+        self.frames_written += len(samples)
+
+    def _encode(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue # keep draining so write() never blocks on a dead encoder
+            samples, tag = item
+            try:
+                start = time.perf_counter()
+                self._write_to_file(samples)
+                if self.on_encoded:
+                    self.on_encoded(tag, time.perf_counter() - start)
+            except Exception as e:
+                self._error = e
+
+    def _finish_encoding(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        if self.sample_rate is None:
+            raise ValueError("No audio was written.")
+        drain_start = time.perf_counter()
+        self._finish_encoding()
+        self.drain_seconds = time.perf_counter() - drain_start
+        self._raise_error()
+        return super().close()
+
+    def abort(self):
+        self._finish_encoding()
+        super().abort()
@@ -0,0 +1,131 @@
+# batch_synthesis.py
+"""
+    Runs several chunks through the Kokoro ONNX session in one call.
+
+    Each kokoro.create() is one session run with a batch of one, and on short chunks the per-run
+    overhead and the small matrix multiplies cost more than the actual work. Chunks of similar token
+    length are padded to the same length and stacked into one run, then the output is split back
+    into per-chunk audio and the padding's trailing audio trimmed off.
+
+    Only used when the model has a dynamic batch axis and returns one waveform per batch row;
+    anything else falls back to one create() per chunk, for good, the first time it fails.
+"""
+import threading
+import builtins
+
+MAX_PHONEME_LENGTH = 510
+SAMPLE_RATE = 24000
+MAX_BATCH = 4
+LENGTH_RATIO = 1.25 # longest / shortest chunk in a batch, keeps the padding small
+SILENCE_THRESHOLD = 1e-3
+
+
+class BatchSynthesizer:
+    def __init__(self, kokoro, max_batch=MAX_BATCH, length_ratio=LENGTH_RATIO):
+        self.kokoro = kokoro
+        self.max_batch = max_batch
+        self.length_ratio = length_ratio
+        self._lock = threading.Lock()
+        self._supported = self._has_batch_axis()
+        self.batched_runs = 0
+        self.single_runs = 0
+
+    @property
+    def supported(self):
+        return self._supported
+
+    def _has_batch_axis(self):
+        try:
+            inputs = self.kokoro.sess.get_inputs()
+        except AttributeError:
+            return False
+        token_input = inputs[0]
+        # Symbolic (string) or unknown first dimension means the batch size isn't baked into the graph
+        return len(token_input.shape) == 2 and not isinstance(token_input.shape[0], int)
+
+    def synthesize(self, requests, voice, speed, report=None):
+        """
+            requests: [(phonemes or text, is_phonemes), ...]. Returns [(samples, sample_rate), ...] in the same order.
+            report(message) is told when batching fails and it falls back to one chunk at a time.
+        """
+        tokenized = [self._tokens(text, is_phonemes) for text, is_phonemes in requests]
+        results = [None] * len(requests)
+
+        for group in self._groups(tokenized):
+            if len(group) > 1 and self._supported:
+                try:
+                    for n, samples in zip(group, self._run_batch([tokenized[n] for n in group], voice, speed)):
+                        results[n] = (samples, SAMPLE_RATE)
+                    self.batched_runs += 1
+                    continue
+                except Exception as e:
+                    self._supported = False
+                    if report:
+                        report(f"Batched inference not supported by this model, rendering one chunk at a time: {e}")
+            for n in group:
+                text, is_phonemes = requests[n]
+                results[n] = self.kokoro.create(text, voice=voice, speed=speed, is_phonemes=is_phonemes)
+                self.single_runs += 1
+        return results
+
+    def _tokens(self, text, is_phonemes):
+        # Plain text is phonemized the way create() does it, in American English
+        phonemes = text if is_phonemes else self.kokoro.tokenizer.phonemize(text, 'en-us')
+        return self.kokoro.tokenizer.tokenize(phonemes)
+
+    def _groups(self, tokenized):
+        """Indexes grouped by similar token length, at most max_batch per group; over-long chunks go alone."""
+        order = sorted(range(len(tokenized)), key=lambda n: len(tokenized[n]))
+        groups = []
+        for n in order:
+            length = len(tokenized[n])
+            group = groups[-1] if groups else None
+            if (group and length <= MAX_PHONEME_LENGTH and len(group) < self.max_batch
+                    and length <= max(1, len(tokenized[group[0]])) * self.length_ratio):
+                group.append(n)
+            else:
+                groups.append([n])
+        return groups
+
+    def _style(self, voice, token_count):
+        style = self.kokoro.get_voice_style(voice) if isinstance(voice, str) else voice
+        return style[token_count]
+
+    def _run_batch(self, token_lists, voice, speed):
+        np = builtins.np
+        longest = max(len(tokens) for tokens in token_lists)
+        # 0 is the pad/boundary token, every row starts and ends with it like create() does
+        padded = np.zeros((len(token_lists), longest + 2), dtype=np.int64)
+        for row, tokens in enumerate(token_lists):
+            padded[row, 1:len(tokens) + 1] = tokens
+        styles = np.concatenate([self._style(voice, len(tokens)) for tokens in token_lists], axis=0).astype(np.float32)
+
+        input_names = [i.name for i in self.kokoro.sess.get_inputs()]
+        if "input_ids" in input_names:
+            inputs = {"input_ids": padded, "style": styles, "speed": np.array([speed], dtype=np.int32)}
+        else:
+            inputs = {"tokens": padded, "style": styles, "speed": np.ones(1, dtype=np.float32) * speed}
+
+        with self._lock:
+            audio = self.kokoro.sess.run(None, inputs)[0]
+        if audio.ndim != 2 or audio.shape[0] != len(token_lists):
+            raise ValueError(f"expected one waveform per chunk, got output shape {audio.shape}")
+        return [self._trim_tail(row) for row in audio]
+
+    @staticmethod
+    def _trim_tail(samples):
+        """Drops the near-silent audio the padding tokens leave at the end of the shorter rows."""
+        loud = builtins.np.flatnonzero(builtins.np.abs(samples) > SILENCE_THRESHOLD)
+        if not len(loud):
+            return samples
+        return samples[:loud[-1] + 1]
+
+
+_synthesizer = None
+
+
+def get_batch_synthesizer(kokoro):
+    global _synthesizer
+    if _synthesizer is None or _synthesizer.kokoro is not kokoro:
+        _synthesizer = BatchSynthesizer(kokoro)
+    return _synthesizer
@@ -0,0 +1,277 @@
+# benchmark.py
+"""
+    Render benchmark: a fixed corpus rendered through the same ChunkRenderer the GUI uses, for every
+    language in LANGUAGE_MAPPING and a few chunk sizes (token budgets).
+
+        python -m core.benchmark --output benchmark.json
+        python -m core.benchmark --languages Japanese "Mandarin Chinese" --chunk-tokens 150 500
+
+    Each run reports the time spent splitting the text, in G2P (including the G2P that sizes chunks by
+    tokens), inference, writing and encoding per chunk, and in the encoder drain and fusion (closing
+    the output file), plus the real-time factor and the peak RSS of this process while that run was
+    going (sampled, the worker processes aren't counted). The caches are left off so every run does the
+    full work. Results go to a JSON file, with enough about the machine to compare them across
+    machines and releases.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import builtins
+from importlib import metadata
+
+from core.engine_loader import add_bundled_libs_to_path, add_external_packages_to_sys_path, add_external_packages_to_dll_path, load_engine
+from core.renderer import ChunkRenderer, LANGUAGE_MAPPING
+from core.model_variants import MODEL_VARIANTS, DEFAULT_VARIANT, get_variant_engine
+from core.engine_registry import get_g2p
+
+CHUNK_TOKEN_SIZES = [100, 250, 500]
+CORPUS_REPEAT = 3 # the corpus paragraph is repeated, so there are enough chunks at the largest size
+RSS_SAMPLE_INTERVAL = 0.05 # seconds
+
+BENCHMARK_VOICES = {
+    'American English': 'af_heart',
+    'British English': 'bf_emma',
+    'Japanese': 'jf_alpha',
+    'French': 'ff_siwis',
+    'Spanish': 'ef_dora',
+    'Italian': 'if_sara',
+    'Hindi': 'hf_alpha',
+    'Brazilian Portuguese': 'pf_dora',
+    'Mandarin Chinese': 'zf_xiaobei',
+}
+
+CORPUS = {
+    'en-us': (
+        "The lighthouse keeper climbed the narrow stairs every evening, counting each step under his breath. "
+        "From the top, the sea looked calm, but he knew better than to trust it. "
+        "Ships had been lost on these rocks for centuries, and the old logbooks were full of their names. "
+        "Tonight the wind was rising, and far to the west a single light was moving towards the harbour."
+    ),
+    'ja': (
+        "灯台守は毎晩、狭い階段を上りながら段数を数えていた。"
+        "上から見ると海は穏やかだったが、彼はそれを信じてはいけないと知っていた。"
+        "何世紀もの間、多くの船がこの岩で失われ、古い航海日誌にはその名前が並んでいる。"
+        "今夜は風が強くなり、はるか西の方で一つの明かりが港に向かって動いていた。"
+    ),
+    'fr-fr': (
+        "Le gardien du phare montait chaque soir l'escalier étroit en comptant les marches à voix basse. "
+        "Vue d'en haut, la mer semblait calme, mais il savait qu'il ne fallait pas s'y fier. "
+        "Depuis des siècles, des navires s'étaient perdus sur ces rochers, et les vieux registres étaient remplis de leurs noms. "
+        "Ce soir, le vent se levait, et loin à l'ouest une seule lumière avançait vers le port."
+    ),
+    'es': (
+        "El farero subía cada noche la estrecha escalera contando los escalones en voz baja. "
+        "Desde arriba, el mar parecía tranquilo, pero sabía que no debía fiarse. "
+        "Durante siglos se habían perdido barcos en estas rocas, y los viejos cuadernos estaban llenos de sus nombres. "
+        "Esta noche el viento arreciaba, y lejos, al oeste, una sola luz avanzaba hacia el puerto."
+    ),
+    'it': (
+        "Il guardiano del faro saliva ogni sera la scala stretta contando i gradini sottovoce. "
+        "Dall'alto il mare sembrava calmo, ma sapeva di non doversi fidare. "
+        "Per secoli le navi si erano perse su questi scogli, e i vecchi registri erano pieni dei loro nomi. "
+        "Stanotte il vento si alzava, e lontano a ovest una sola luce si muoveva verso il porto."
+    ),
+    'hi': (
+        "प्रकाशस्तंभ का रखवाला हर शाम संकरी सीढ़ियाँ चढ़ता और धीरे से हर कदम गिनता था। "
+        "ऊपर से समुद्र शांत दिखता था, लेकिन वह जानता था कि उस पर भरोसा नहीं करना चाहिए। "
+        "सदियों से इन चट्टानों पर जहाज़ खोते आए थे, और पुरानी पुस्तिकाएँ उनके नामों से भरी थीं। "
+        "आज रात हवा तेज़ हो रही थी, और दूर पश्चिम में एक अकेली रोशनी बंदरगाह की ओर बढ़ रही थी।"
+    ),
+    'pt-br': (
+        "O faroleiro subia todas as noites a escada estreita, contando os degraus em voz baixa. "
+        "Lá de cima, o mar parecia calmo, mas ele sabia que não devia confiar nele. "
+        "Durante séculos, navios se perderam nessas rochas, e os velhos diários de bordo estavam cheios de seus nomes. "
+        "Esta noite o vento aumentava, e ao longe, a oeste, uma única luz se movia em direção ao porto."
+    ),
+    'zh': (
+        "灯塔看守人每天晚上都沿着狭窄的楼梯往上爬，一边低声数着台阶。"
+        "从塔顶望去，大海看起来很平静，但他知道不能相信它。"
+        "几个世纪以来，许多船只在这些礁石上沉没，旧航海日志里写满了它们的名字。"
+        "今晚风越来越大，远在西边，一盏孤灯正朝着港口移动。"
+    ),
+}
+CORPUS['en-gb'] = CORPUS['en-us']
+
+
+def corpus_for(language):
+    paragraph = CORPUS[LANGUAGE_MAPPING.get(language, 'en-us')]
+    separator = "" if LANGUAGE_MAPPING.get(language) in ('ja', 'zh') else " "
+    return separator.join([paragraph] * CORPUS_REPEAT)
+
+
+def current_rss_bytes():
+    """Current resident set size of this process, or None where it can't be read."""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+class RssSampler:
+    """
+        Peak RSS over one run, sampled from a background thread. The OS high-water mark (ru_maxrss,
+        PeakWorkingSetSize) covers the whole process lifetime, so every run after the largest one
+        would just repeat its number.
+    """
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start = current_rss_bytes()
+        self.peak = self.start
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._update()
+
+    def _update(self):
+        rss = current_rss_bytes()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._update()
+        return False
+
+
+def machine_info():
+    def version(package):
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "onnxruntime": version("onnxruntime"),
+        "kokoro_onnx": version("kokoro-onnx"),
+        "misaki": version("misaki"),
+    }
+
+
+def run_benchmark(languages=None, chunk_sizes=CHUNK_TOKEN_SIZES, model_variant=DEFAULT_VARIANT, workers=None, report=print):
+    """Renders the corpus for every language and chunk size. Returns the results as a dict ready for json.dump."""
+    if not hasattr(builtins, 'kokoro_instance'):
+        add_bundled_libs_to_path()
+        add_external_packages_to_sys_path(report=lambda msg: None)
+        add_external_packages_to_dll_path(report=lambda msg: None)
+        load_engine(report=lambda msg: None)
+    kokoro, model_path = get_variant_engine(model_variant)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": machine_info(),
+        "model": os.path.basename(model_path),
+        "workers": workers,
+        "runs": [],
+    }
+    output_dir = tempfile.mkdtemp(prefix="usei_benchmark_")
+    try:
+        for language in languages or list(LANGUAGE_MAPPING):
+            voice = BENCHMARK_VOICES.get(language, 'af_heart')
+            text = corpus_for(language)
+            if LANGUAGE_MAPPING[language] not in ('en-us', 'en-gb'):
+                get_g2p(LANGUAGE_MAPPING[language]) # build the frontend before the clock starts
+            for chunk_tokens in chunk_sizes:
+                renderer = ChunkRenderer(
+                    text, voice, 1.0, language, kokoro, os.path.join(output_dir, "benchmark.wav"),
+                    workers=workers,
+                    model_path=model_path,
+                    max_chunk_tokens=chunk_tokens
+                )
+                with RssSampler() as rss:
+                    message, fused_file = renderer.run()
+                if not fused_file:
+                    report(f"{language} @ {chunk_tokens} tokens: {message}")
+                    results["runs"].append({"language": language, "voice": voice, "chunk_tokens": chunk_tokens, "error": message})
+                    continue
+
+                totals = renderer.stats.totals()
+                chunks = [renderer.stats.chunks[i] for i in sorted(renderer.stats.chunks)]
+                peak_rss = rss.peak
+                run = {
+                    "language": language,
+                    "voice": voice,
+                    "chunk_tokens": chunk_tokens,
+                    "chunks": len(chunks),
+                    "mean_chunk_chars": sum(chunk["chars"] for chunk in chunks) / max(len(chunks), 1),
+                    "seconds": {stage: totals[stage] for stage in ("split", "g2p", "inference", "write", "encode", "queue_wait", "drain", "fusion", "wall")},
+                    "audio_seconds": totals["audio_seconds"],
+                    "rtf": totals["rtf"],
+                    "start_rss_mb": rss.start / (1024 * 1024) if rss.start else None,
+                    "peak_rss_mb": peak_rss / (1024 * 1024) if peak_rss else None,
+                    "per_chunk": chunks,
+                }
+                results["runs"].append(run)
+                report(
+                    f"{language:<22} {chunk_tokens:>4} tok  {len(chunks):>3} chunks  "
+                    f"split {totals['split']:6.2f}s  g2p {totals['g2p']:6.2f}s  inference {totals['inference']:7.2f}s  "
+                    f"write {totals['write']:5.2f}s  encode {totals['encode']:5.2f}s  drain {totals['drain']:5.2f}s  fusion {totals['fusion']:5.2f}s  RTF {totals['rtf']:.3f}  "
+                    f"peak RSS {run['peak_rss_mb'] or 0:.0f} MB"
+                )
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Usei's render path for every language.")
+    parser.add_argument('--output', default="benchmark.json", help="where to write the results (JSON)")
+    parser.add_argument('--languages', nargs='+', choices=list(LANGUAGE_MAPPING), default=None)
+    parser.add_argument('--chunk-tokens', nargs='+', type=int, default=CHUNK_TOKEN_SIZES, help="token budgets per chunk to compare")
+    parser.add_argument('--model', default=DEFAULT_VARIANT, choices=list(MODEL_VARIANTS))
+    parser.add_argument('--workers', type=int, default=None, help="render on N worker processes (0 = one per CPU)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.languages, args.chunk_tokens, args.model, args.workers)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+    return 0 if all("error" not in run for run in results["runs"]) else 1
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    from core.render_pool import shutdown_worker_pool
+    try:
+        exit_code = main()
+    finally:
+        shutdown_worker_pool()
+    sys.exit(exit_code)
@@ -0,0 +1,285 @@
+# downloader.py
+"""
+    Resumable downloads for the model files.
+
+    A file is downloaded to "<name>.part" and only gets its real name once it is complete. If the server
+    answers range requests (GitHub's release storage does), the .part file is allocated at full size and
+    filled in a few ranges at once. "<name>.part.json" tracks how far each range got, so a dropped
+    connection retries only what is missing, and a download stopped by closing the app picks up where
+    it left off on the next start. Servers without range support get the old single-stream download,
+    which starts over from the first byte.
+
+    No Qt in here: progress, messages and stop requests go through callbacks, so it can be run against
+    any HTTP server, a local stand-in included.
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+DOWNLOAD_WORKERS = 4
+MIN_RANGE_SIZE = 8 * 1024 * 1024 # files are only split into ranges at least this big
+BLOCK_SIZE = 64 * 1024
+STATE_SAVE_INTERVAL = 1.0 # seconds
+REQUEST_TIMEOUT = 30
+
+
+class DownloadStopped(Exception):
+    pass
+
+
+class RangesNotSupported(Exception):
+    pass
+
+
+def probe(url):
+    """(size, ranges supported) of a download; the size is 0 if the server doesn't say."""
+    with requests.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        total = response.headers.get('content-range', '').rpartition('/')[2]
+        if response.status_code == 206 and total.isdigit():
+            return int(total), True
+        return int(response.headers.get('content-length', 0)), False
+
+
+def split_ranges(size, workers):
+    """[start, end (inclusive), bytes done] for each part of the file."""
+    count = max(1, min(workers, size // MIN_RANGE_SIZE))
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+
+
+class ResumableDownload:
+    def __init__(self, url, destination, on_progress=None, on_message=None, should_stop=None,
+                 workers=DOWNLOAD_WORKERS, retries=10, backoff_factor=1):
+        self.url = url
+        self.destination = destination
+        self.part_path = destination + PART_SUFFIX
+        self.state_path = destination + STATE_SUFFIX
+        self.name = os.path.basename(destination)
+        self.on_progress = on_progress
+        self.on_message = on_message
+        self.should_stop = should_stop or (lambda: False)
+        self.workers = max(1, workers)
+        self.retries = max(1, retries)
+        self.backoff_factor = backoff_factor
+
+        self.size = 0
+        self.ranges = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event() # set on a stop request, or when one range gave up
+        self._last_progress = -1
+
+    def _message(self, text):
+        if self.on_message:
+            self.on_message(text)
+
+    def _progress(self, done):
+        progress = int(done * 100 / self.size) if self.size > 0 else 0
+        if progress != self._last_progress and self.on_progress:
+            self.on_progress(progress)
+        self._last_progress = progress
+
+    def _backoff(self, attempt, error):
+        """Waits before the next attempt; raises the error once the retries are used up."""
+        if attempt >= self.retries - 1:
+            raise error
+        wait_time = self.backoff_factor * (2 ** attempt)
+        self._message(f'Retrying "{self.name}" in {wait_time:.1f}s ({error})...')
+        deadline = time.monotonic() + wait_time
+        while time.monotonic() < deadline:
+            if self.should_stop() or self._stop.wait(min(0.2, max(0.0, deadline - time.monotonic()))):
+                raise DownloadStopped()
+
+    def run(self):
+        """Returns True once destination holds the complete file."""
+        self._progress(0)
+        try:
+            for attempt in range(self.retries):
+                if self.should_stop():
+                    return False
+                try:
+                    self.size, ranged = probe(self.url)
+                    break
+                except requests.RequestException as e:
+                    self._backoff(attempt, e)
+
+            self._message(f'Initiating download for "{self.name}" (expected size: {self.size} bytes)...')
+            if ranged and self.size > 0:
+                try:
+                    self._download_ranges()
+                except RangesNotSupported:
+                    self._message(f'The server ignored a range request for "{self.name}", downloading it in one piece.')
+                    self._discard_part()
+                    self._download_whole()
+            else:
+                self._discard_part()
+                self._download_whole()
+
+            if self.size > 0 and os.path.getsize(self.part_path) != self.size:
+                actual_size = os.path.getsize(self.part_path)
+                self._discard_part()
+                raise IOError(f"Size mismatch: {actual_size} vs {self.size} bytes")
+            os.replace(self.part_path, self.destination)
+            self._remove(self.state_path)
+        except DownloadStopped:
+            return False
+        except Exception as e:
+            self._message(f'Failed to download "{self.name}": {e}')
+            return False
+
+        self._message(f'Download of "{self.name}" completed.')
+        if self.on_progress and self._last_progress != 100:
+            self.on_progress(100)
+        return True
+
+    # Ranged download
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("url") != self.url or state.get("size") != self.size:
+                return None
+            if os.path.getsize(self.part_path) != self.size:
+                return None
+            ranges = [[int(start), int(end), int(done)] for start, end, done in state["ranges"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if any(done < 0 or done > end - start + 1 for start, end, done in ranges):
+            return None
+        return ranges
+
+    def _save_state(self):
+        with self._lock:
+            state = {"url": self.url, "size": self.size, "ranges": [list(part) for part in self.ranges]}
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _done(self):
+        with self._lock:
+            return sum(part[2] for part in self.ranges)
+
+    def _download_ranges(self):
+        ranges = self._load_state()
+        if ranges is not None:
+            self.ranges = ranges
+            self._message(f'Resuming "{self.name}" at {self._done() * 100 // self.size}%.')
+        else:
+            self.ranges = split_ranges(self.size, self.workers)
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.size)
+        self._save_state()
+
+        pending = [part for part in self.ranges if part[2] < part[1] - part[0] + 1]
+        stopped = False
+        with ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix="download") as pool:
+            futures = [pool.submit(self._fetch_range, part) for part in pending]
+            last_save = time.monotonic()
+            while futures:
+                finished, running = wait(futures, timeout=0.2)
+                if self.should_stop() and not stopped:
+                    stopped = True
+                    self._stop.set()
+                if any(future.exception() is not None for future in finished):
+                    self._stop.set() # no point in finishing the other ranges now
+                self._progress(self._done())
+                if time.monotonic() - last_save >= STATE_SAVE_INTERVAL:
+                    self._save_state()
+                    last_save = time.monotonic()
+                if not running:
+                    break
+        self._save_state() # what got through is kept for the next attempt
+
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        errors = [error for error in errors if not isinstance(error, DownloadStopped)]
+        if stopped:
+            raise DownloadStopped()
+        if errors:
+            raise errors[0]
+
+    def _fetch_range(self, part):
+        start, end = part[0], part[1]
+        attempt = 0
+        while part[2] < end - start + 1:
+            if self._stop.is_set():
+                raise DownloadStopped()
+            received = 0
+            try:
+                headers = {'Range': f'bytes={start + part[2]}-{end}'}
+                with requests.get(self.url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RangesNotSupported()
+                    # Unbuffered, so the state file never counts bytes that aren't written yet
+                    with open(self.part_path, 'r+b', buffering=0) as f:
+                        f.seek(start + part[2])
+                        for block in response.iter_content(chunk_size=BLOCK_SIZE):
+                            if self._stop.is_set():
+                                raise DownloadStopped()
+                            view = memoryview(block)[:end - start + 1 - part[2]]
+                            while view:
+                                written = f.write(view)
+                                view = view[written:]
+                                with self._lock:
+                                    part[2] += written
+                                received += written
+                if part[2] < end - start + 1:
+                    raise IOError(f"connection closed at byte {start + part[2]}")
+            except (DownloadStopped, RangesNotSupported):
+                raise
+            except (requests.RequestException, IOError) as e:
+                if received:
+                    attempt = 0 # it's making progress, only give up on a range that stopped moving
+                self._backoff(attempt, e)
+                attempt += 1
+
+    # Single stream, for servers without range support
+
+    def _download_whole(self):
+        for attempt in range(self.retries):
+            try:
+                with requests.get(self.url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                    response.raise_for_status()
+                    self.size = int(response.headers.get('content-length', 0)) or self.size
+                    downloaded = 0
+                    with open(self.part_path, 'wb') as f:
+                        for block in response.iter_content(chunk_size=BLOCK_SIZE):
+                            if self.should_stop():
+                                f.close()
+                                self._discard_part()
+                                raise DownloadStopped()
+                            f.write(block)
+                            downloaded += len(block)
+                            self._progress(downloaded)
+                if self.size > 0 and downloaded != self.size:
+                    raise IOError(f"Size mismatch: {downloaded} vs {self.size} bytes")
+                return
+            except (requests.RequestException, IOError) as e:
+                self._backoff(attempt, e)
+
+    def _discard_part(self):
+        self._remove(self.part_path)
+        self._remove(self.state_path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_file(url, destination, on_progress=None, on_message=None, should_stop=None,
+                  workers=DOWNLOAD_WORKERS, retries=10, backoff_factor=1):
+    """Downloads url to destination, resuming an earlier partial download of it. Returns True on success."""
+    return ResumableDownload(url, destination, on_progress=on_progress, on_message=on_message,
+                             should_stop=should_stop, workers=workers, retries=retries,
+                             backoff_factor=backoff_factor).run()
@@ -0,0 +1,176 @@
+# engine_loader.py
+"""
+    Imports the TTS engine and puts it in builtins, without Qt.
+    The G2P converters of the other languages are left to core.engine_registry, built when first needed.
+
+    ModuleLoaderThread runs the steps separately, as part of its startup graph (core/startup_graph.py),
+    so they can overlap with the model check. The headless batch renderer (cli.py) calls load_engine().
+"""
+import importlib
+import builtins
+import sys
+import os
+import traceback
+
+from core.paths import get_app_root, get_model_dir
+from core.onnx_session import create_session
+
+KOKORO_MODEL_FILE = 'kokoro-v1.0.onnx'
+KOKORO_VOICES_FILE = 'voices-v1.0.bin'
+
+
+def add_bundled_libs_to_path():
+    """Adds the bundled_libs directory to sys.path and the DLL search path."""
+    try:
+        # Determine base_dir (handle frozen/script mode)
+        if getattr(sys, 'frozen', False):
+            base_dir = os.path.join(os.path.dirname(sys.executable), '_internal', 'core')
+            if not os.path.isdir(base_dir):
+                 base_dir = os.path.dirname(sys.executable)
+        else:
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+
+        bundled_libs_path = os.path.join(base_dir, 'bundled_libs')
+
+        # --- Check if bundled_libs directory itself exists ---
+        if os.path.isdir(bundled_libs_path):
+            added_to_sys_path = False
+            if bundled_libs_path not in sys.path:
+                sys.path.insert(0, bundled_libs_path)
+                print(f"INFO: Added bundled libraries path to sys.path: {bundled_libs_path}")
+                importlib.invalidate_caches()
+                added_to_sys_path = True
+            else:
+                print(f"INFO: Bundled libraries path already in sys.path: {bundled_libs_path}")
+                added_to_sys_path = True
+
+            dll_path_added = False
+            if sys.platform == 'win32' and hasattr(os, 'add_dll_directory'):
+                try:
+                    abs_bundled_libs_path = os.path.abspath(bundled_libs_path)
+                    print(f"INFO: Attempting to add bundled libs to DLL search path: {abs_bundled_libs_path}")
+                    os.add_dll_directory(abs_bundled_libs_path)
+                    print(f"INFO: Successfully added bundled libs to DLL search path.")
+                    dll_path_added = True
+                except OSError as e_dll_os:
+                    print(f"WARNING: Failed to add bundled libs path '{abs_bundled_libs_path}' to DLL search path: {e_dll_os}")
+                except Exception as e_dll:
+                    print(f"WARNING: Unexpected error adding bundled libs path to DLL search path: {e_dll}")
+            elif sys.platform != 'win32':
+                dll_path_added = True
+                print("INFO: Not on Windows, skipping DLL search path addition.")
+            else:
+                print("WARNING: os.add_dll_directory not available. Bundled DLLs might not be found by dependent libraries.")
+
+            return added_to_sys_path
+        else:
+            print(f"WARNING: Bundled libraries path not found: {bundled_libs_path}")
+            return False
+    except Exception as e:
+        print(f"ERROR: Failed to configure bundled libs path: {e}")
+        print(traceback.format_exc())
+        return False
+
+
+def get_external_packages_dir():
+    """Where uv installs the packages that aren't bundled."""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), "external_packages")
+    return os.path.join(get_app_root(), "external_packages")
+
+
+def add_external_packages_to_sys_path(report=print):
+    """Puts external_packages (where the first start installs the engine packages) on sys.path, for the entry points without the splash."""
+    ext_pkg_dir = get_external_packages_dir()
+    if os.path.isdir(ext_pkg_dir) and ext_pkg_dir not in sys.path:
+        sys.path.insert(0, ext_pkg_dir)
+        importlib.invalidate_caches()
+        report(f"Added {ext_pkg_dir} to sys.path.")
+
+
+def add_external_packages_to_dll_path(report=print):
+    """Adds external_packages to the DLL search path (Windows only)."""
+    ext_pkg_dir = get_external_packages_dir()
+    try:
+        if os.path.isdir(ext_pkg_dir):
+            if sys.platform == 'win32' and hasattr(os, 'add_dll_directory'):
+                try:
+                    abs_ext_pkg_path = os.path.abspath(ext_pkg_dir)
+                    report(f"Attempting to add external packages dir to DLL search path: {abs_ext_pkg_path}")
+                    os.add_dll_directory(abs_ext_pkg_path)
+                    report(f"Successfully added external packages dir to DLL search path.")
+                except OSError as e_dll_os_ext:
+                    report(f"WARNING: Failed to add external packages path '{abs_ext_pkg_path}' to DLL search path: {e_dll_os_ext}")
+                except Exception as e_dll_ext:
+                    report(f"WARNING: Unexpected error adding external packages path to DLL search path: {e_dll_ext}")
+        else:
+            report(f"WARNING: External packages directory {ext_pkg_dir} not found after install, cannot add to DLL path.")
+    except Exception as e_add_ext_path:
+         report(f"ERROR: Failed during setup of external packages DLL path: {e_add_ext_path}\n{traceback.format_exc()}")
+
+
+def import_audio_modules(report=print):
+    """soundfile and numpy."""
+    importlib.invalidate_caches()
+    report("Importing soundfile & numpy...")
+    return importlib.import_module("soundfile"), importlib.import_module("numpy")
+
+
+def import_kokoro(report=print):
+    report("Importing kokoro...")
+    return importlib.import_module("kokoro_onnx")
+
+
+def create_engine(kokoro_mod, model_dir=None, session_config=None, report=print):
+    """Builds the Kokoro instance on its ONNX session. Returns (instance, model path, voices path)."""
+    report("Instantiating Kokoro TTS engine...")
+    model_dir = model_dir or get_model_dir()
+    kokoro_model_path = os.path.join(model_dir, KOKORO_MODEL_FILE)
+    voices_path = os.path.join(model_dir, KOKORO_VOICES_FILE)
+    if not os.path.exists(kokoro_model_path): raise FileNotFoundError(f"Kokoro model not found: {kokoro_model_path}")
+    if not os.path.exists(voices_path): raise FileNotFoundError(f"Voices file not found: {voices_path}")
+    session = create_session(kokoro_model_path, session_config, report=report)
+    instance = kokoro_mod.Kokoro.from_session(session, voices_path)
+    report("Kokoro instance created.")
+    return instance, kokoro_model_path, voices_path
+
+
+def publish_engine(sf, np, engine, session_config=None, report=print):
+    """Assigns the modules and the create_engine() result to builtins, where the rest of the app looks for them."""
+    report("Assigning modules to builtins...")
+    instance, kokoro_model_path, voices_path = engine
+    builtins.sf = sf
+    builtins.np = np
+    builtins.kokoro_instance = instance
+    builtins.kokoro_model_path = kokoro_model_path # Parallel render workers load their own copy
+    builtins.kokoro_voices_path = voices_path
+    builtins.kokoro_session_config = session_config or {}
+    return instance
+
+
+def load_engine(model_dir=None, report=print, milestone=None, session_config=None):
+    """
+        Imports soundfile, numpy and kokoro_onnx, builds the Kokoro instance and assigns them
+        to builtins. Returns the Kokoro instance. The splash screen runs the same steps as a graph
+        (see ModuleLoaderThread.run), this is the one-after-another version for the CLI.
+
+        milestone(percent) is called before each step with the loading percentage reached when it ends.
+        session_config overrides onnx_session.SESSION_DEFAULTS (threads, execution mode, optimization level).
+        Import errors are raised to the caller.
+    """
+    milestone = milestone or (lambda percent: None)
+
+    milestone(55)
+    sf, np = import_audio_modules(report)
+
+    milestone(85)
+    kokoro_mod = import_kokoro(report)
+    report("Modules imported successfully.")
+
+    milestone(95)
+    engine = create_engine(kokoro_mod, model_dir, session_config, report)
+
+    milestone(100)
+    instance = publish_engine(sf, np, engine, session_config, report)
+    report("Language frontends will be loaded when a language is first used.")
+    return instance
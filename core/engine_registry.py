@@ -0,0 +1,82 @@
+# engine_registry.py
+"""
+    Language frontends (the G2P converters), imported and built the first time a language needs one.
+
+    misaki.ja pulls in pyopenjtalk and its dictionary and misaki.zh its own models, which used to cost
+    every start, even for users who only ever render English. Now the loader only builds the Kokoro
+    engine; a frontend is built by the first render in its language, or ahead of time by warm_up(),
+    which the TTS dock calls when a language is picked.
+
+    English never needs one: kokoro phonemizes English text itself. Every other language gets its
+    own espeak converter, built once instead of once per chunk.
+"""
+import builtins
+import importlib
+import threading
+
+_frontends = {} # language code -> G2P callable
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _lock_for(language_code):
+    with _locks_lock:
+        return _locks.setdefault(language_code, threading.Lock())
+
+
+def _build(language_code):
+    # The builtins names are the ones the loader used to set, kept for code that still looks there
+    if language_code == 'ja':
+        ja_g2p_module = importlib.import_module("misaki.ja")
+        pyopenjtalk_mod = importlib.import_module("pyopenjtalk")
+        if 'bundled_libs' not in pyopenjtalk_mod.__file__:
+            print("WARNING: Imported pyopenjtalk may not be the bundled version!")
+        builtins.ja_g2p_instance = ja_g2p_module.JAG2P()
+        return builtins.ja_g2p_instance
+    if language_code == 'zh':
+        zh_g2p_module = importlib.import_module("misaki.zh")
+        builtins.zh_g2p_instance = zh_g2p_module.ZHG2P()
+        return builtins.zh_g2p_instance
+
+    espeak = importlib.import_module("misaki.espeak")
+    builtins.espeak_instance = espeak
+    builtins.g2p_instance = espeak.EspeakG2P
+    return espeak.EspeakG2P(language=language_code)
+
+
+def get_g2p(language_code):
+    """The G2P converter for a language, built on first use. Import errors are raised to the caller."""
+    frontend = _frontends.get(language_code)
+    if frontend is not None:
+        return frontend
+    with _lock_for(language_code):
+        if language_code not in _frontends:
+            _frontends[language_code] = _build(language_code)
+        return _frontends[language_code]
+
+
+def is_ready(language_code):
+    return language_code in _frontends
+
+
+def warm_up(language_code, on_done=None):
+    """
+        Builds the frontend on a background thread, so the first render in that language doesn't wait for it.
+        on_done(error) is called from that thread, with None on success. Returns the thread, or None if
+        there's nothing to do.
+    """
+    if language_code in ('en-us', 'en-gb') or is_ready(language_code):
+        return None
+
+    def run():
+        try:
+            get_g2p(language_code)
+            error = None
+        except Exception as e:
+            error = e
+        if on_done:
+            on_done(error)
+
+    thread = threading.Thread(target=run, name=f"g2p-warm-up-{language_code}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,103 @@
+# env_fingerprint.py
+"""
+    Fingerprint of the Python environment after a successful package check.
+
+    The full check looks up every required module, and imports the ones with a pinned version just to
+    read it, which takes seconds. The fingerprint only needs a directory listing and a stat per module:
+    the Python build, the requirement list, the .dist-info folders in external_packages (their names
+    carry the versions) and where each module was found, with its modification time. If all of it is
+    unchanged, the check is skipped. Anything else (an install, an update, a deleted package, a new
+    requirement) makes it run again.
+"""
+import os
+import sys
+import json
+import importlib.util
+
+from core.paths import get_cache_dir
+
+FINGERPRINT_FILE = "environment.json"
+FINGERPRINT_VERSION = 1
+
+
+def fingerprint_path():
+    return os.path.join(get_cache_dir('startup'), FINGERPRINT_FILE)
+
+
+def _dist_info(ext_pkg_dir):
+    try:
+        entries = sorted(entry for entry in os.listdir(ext_pkg_dir) if entry.endswith('.dist-info'))
+    except OSError:
+        return []
+    return [[entry, os.stat(os.path.join(ext_pkg_dir, entry)).st_mtime_ns] for entry in entries]
+
+
+def _module_origin(import_name):
+    spec = importlib.util.find_spec(import_name)
+    if spec is None:
+        return None
+    if spec.submodule_search_locations:
+        return list(spec.submodule_search_locations)[0]
+    return spec.origin
+
+
+def _quick_state(requirements, ext_pkg_dir):
+    """The part that can be compared without looking up any module."""
+    return {
+        "version": FINGERPRINT_VERSION,
+        "python": sys.version,
+        "executable": sys.executable,
+        "requirements": [list(requirement) for requirement in requirements],
+        "external_packages": os.path.abspath(ext_pkg_dir),
+        "dist_info": _dist_info(ext_pkg_dir),
+    }
+
+
+def save_fingerprint(requirements, ext_pkg_dir):
+    """
+        Stores the fingerprint of the environment the check just passed in.
+        requirements are the (package, description, version, import name) tuples of the check.
+    """
+    origins = {}
+    for pkg_name, _, _, import_name in requirements:
+        origin = _module_origin(import_name or pkg_name)
+        if origin is None or not os.path.exists(origin):
+            return False # something the check accepted can't be pinned down, don't trust a fingerprint
+        origins[import_name or pkg_name] = [origin, os.stat(origin).st_mtime_ns]
+
+    fingerprint = dict(_quick_state(requirements, ext_pkg_dir), origins=origins)
+    path = fingerprint_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f, indent=1)
+    os.replace(temp_path, path)
+    return True
+
+
+def fingerprint_matches(requirements, ext_pkg_dir):
+    """True if the environment looks exactly like it did after the last successful check."""
+    try:
+        with open(fingerprint_path(), 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    origins = stored.pop("origins", None)
+    if stored != _quick_state(requirements, ext_pkg_dir) or not isinstance(origins, dict):
+        return False
+    for origin, mtime_ns in origins.values():
+        try:
+            if os.stat(origin).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def clear_fingerprint():
+    """Forces a full check on the next start, e.g. after an import failed despite a matching fingerprint."""
+    try:
+        os.remove(fingerprint_path())
+    except OSError:
+        pass
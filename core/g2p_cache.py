@@ -0,0 +1,114 @@
+# g2p_cache.py
+"""
+    Memoized G2P results, keyed on (language, chunk text).
+
+    Japanese, Mandarin and the eSpeak languages spend a lot of time in phonemization, and an
+    edit-and-rerender session phonemizes the same sentences over and over. Results live in a
+    bounded in-memory LRU and, optionally, in a small SQLite store that survives restarts.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+from core.paths import get_cache_dir
+
+MEMORY_ENTRIES = 4096
+STORE_FILE = "g2p.sqlite3"
+
+_cache = None
+
+
+def g2p_engine_version():
+    """Phonemes from another misaki version may differ, so they are kept apart."""
+    try:
+        return metadata.version("misaki")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class G2PCache:
+    def __init__(self, max_entries=MEMORY_ENTRIES, store_path=None, engine_version=""):
+        self.max_entries = max_entries
+        self.engine_version = engine_version
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = None
+        if store_path:
+            self.open_store(store_path)
+
+    def open_store(self, store_path):
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        # Accessed from the render pipeline's G2P thread, which is a new thread every render
+        self._store = sqlite3.connect(store_path, check_same_thread=False)
+        self._store.execute(
+            "CREATE TABLE IF NOT EXISTS g2p (engine TEXT, language TEXT, text TEXT, phonemes TEXT, PRIMARY KEY (engine, language, text))"
+        )
+        self._store.commit()
+
+    def close_store(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+    @property
+    def persistent(self):
+        return self._store is not None
+
+    def get(self, language_code, text):
+        key = (language_code, text)
+        with self._lock:
+            phonemes = self._memory.get(key)
+            if phonemes is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return phonemes
+
+            if self._store is not None:
+                row = self._store.execute(
+                    "SELECT phonemes FROM g2p WHERE engine = ? AND language = ? AND text = ?",
+                    (self.engine_version, language_code, text)
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, language_code, text, phonemes):
+        with self._lock:
+            self._remember((language_code, text), phonemes)
+            if self._store is not None:
+                self._store.execute(
+                    "INSERT OR REPLACE INTO g2p (engine, language, text, phonemes) VALUES (?, ?, ?, ?)",
+                    (self.engine_version, language_code, text, phonemes)
+                )
+                self._store.commit()
+
+    def _remember(self, key, phonemes):
+        self._memory[key] = phonemes
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+
+def get_g2p_cache(persistent=False):
+    """Returns the shared cache, opening or closing its SQLite store to match the settings."""
+    global _cache
+    if _cache is None:
+        _cache = G2PCache(engine_version=g2p_engine_version())
+    if persistent and not _cache.persistent:
+        _cache.open_store(os.path.join(get_cache_dir('g2p'), STORE_FILE))
+    elif not persistent and _cache.persistent:
+        _cache.close_store()
+    return _cache
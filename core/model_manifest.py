@@ -0,0 +1,83 @@
+# model_manifest.py
+"""
+    Local checksum manifest of the model files (models/kokoro/manifest.json).
+
+    Each file is recorded with its size, SHA-256 and modification time once it is known to be good. A
+    start then only needs a stat: a file with the recorded size and mtime is taken as is, a touched file
+    is hashed again and compared, and a file with a different size or hash is reported as damaged.
+
+    A file the manifest doesn't know yet (an install from before the manifest) is hashed and recorded
+    the first time it is seen, without asking the network; comparing it with the download server is
+    left to the opt-in online check.
+"""
+import os
+import json
+import hashlib
+
+MANIFEST_FILE = "manifest.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelManifest:
+    def __init__(self, model_dir):
+        self.path = os.path.join(model_dir, MANIFEST_FILE)
+        self.entries = {} # file name -> {"size", "sha256", "mtime_ns"}
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self.entries = entries
+        except (OSError, ValueError):
+            pass
+
+    def record(self, file_path):
+        """Hashes the file and stores it as the known good copy."""
+        stat = os.stat(file_path)
+        self.entries[os.path.basename(file_path)] = {
+            "size": stat.st_size,
+            "sha256": file_sha256(file_path),
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        self.dirty = True
+
+    def forget(self, file_path):
+        if self.entries.pop(os.path.basename(file_path), None) is not None:
+            self.dirty = True
+
+    def verify(self, file_path):
+        """Returns (ok, message); the hash only runs again when the file's mtime changed."""
+        name = os.path.basename(file_path)
+        stat = os.stat(file_path)
+        entry = self.entries.get(name)
+        if entry is None:
+            self.record(file_path)
+            return True, f'"{name}" added to the model manifest ({stat.st_size} bytes).'
+        if stat.st_size != entry.get("size"):
+            return False, f'"{name}" size changed: expected {entry.get("size")}, found {stat.st_size} bytes.'
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            return True, f'"{name}" unchanged since it was verified ({stat.st_size} bytes).'
+
+        if file_sha256(file_path) != entry.get("sha256"):
+            return False, f'"{name}" checksum doesn\'t match the manifest.'
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self.dirty = True
+        return True, f'"{name}" was touched, checksum still matches.'
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
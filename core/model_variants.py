@@ -0,0 +1,162 @@
+# model_variants.py
+"""
+    Alternative Kokoro model files: the full fp32 model and its fp16 and int8 (dynamic quantization)
+    versions, all from the kokoro-onnx release. The variant is picked per language in the TTS dock;
+    every variant gets its own engine, built on first use and kept for the session.
+
+    benchmark_variants() renders the same sample on every variant that is on disk and compares it
+    to the fp32 output, so the dock can recommend the fastest variant that still sounds the same.
+    Quantized models may pick slightly different durations, so the comparison doesn't line up
+    samples: it looks at the length and at the average spectrum of the whole clip.
+"""
+import os
+import json
+import time
+import threading
+import builtins
+import importlib
+
+from core.paths import get_model_dir
+from core.onnx_session import create_session
+
+DEFAULT_VARIANT = 'fp32'
+MODEL_VARIANTS = {
+    'fp32': 'kokoro-v1.0.onnx',
+    'fp16': 'kokoro-v1.0.fp16.onnx',
+    'int8': 'kokoro-v1.0.int8.onnx',
+}
+MODEL_BASE_URL = 'https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/'
+
+# A variant is only recommended if it stays this close to the fp32 output
+MAX_DURATION_DIFF = 0.05 # relative
+MAX_SPECTRAL_DIFF_DB = 1.5 # mean difference of the average log spectrum
+BENCHMARK_RUNS = 3
+
+SAMPLE_TEXT = {
+    'en-us': "The quick brown fox jumps over the lazy dog, then takes a long nap in the afternoon sun.",
+    'en-gb': "The quick brown fox jumps over the lazy dog, then takes a long nap in the afternoon sun.",
+    'ja': "今日はとても良い天気ですね。午後は公園を散歩しましょう。",
+    'fr-fr': "Le renard brun rapide saute par-dessus le chien paresseux, puis fait une longue sieste au soleil.",
+    'es': "El rápido zorro marrón salta sobre el perro perezoso y luego duerme una larga siesta al sol.",
+    'it': "La volpe marrone salta sopra il cane pigro, poi fa un lungo pisolino al sole del pomeriggio.",
+    'hi': "तेज़ भूरी लोमड़ी आलसी कुत्ते के ऊपर कूदती है, फिर दोपहर की धूप में लंबी झपकी लेती है।",
+    'pt-br': "A rápida raposa marrom pula sobre o cão preguiçoso e depois tira um longo cochilo ao sol.",
+    'zh': "今天天气很好，我们下午去公园散步吧。",
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def variant_file(variant):
+    return MODEL_VARIANTS.get(variant, MODEL_VARIANTS[DEFAULT_VARIANT])
+
+
+def variant_path(variant, model_dir=None):
+    return os.path.join(model_dir or get_model_dir(), variant_file(variant))
+
+
+def variant_url(variant):
+    return MODEL_BASE_URL + variant_file(variant)
+
+
+def available_variants(model_dir=None):
+    return [variant for variant in MODEL_VARIANTS if os.path.exists(variant_path(variant, model_dir))]
+
+
+def parse_variant_choices(value):
+    """The TTS/ModelVariants setting: a JSON object of language name -> variant."""
+    try:
+        choices = json.loads(value) if value else {}
+    except (TypeError, ValueError):
+        return {}
+    return {language: variant for language, variant in choices.items() if variant in MODEL_VARIANTS} if isinstance(choices, dict) else {}
+
+
+def get_variant_engine(variant):
+    """Returns (kokoro instance, model path) for a variant, building its session the first time."""
+    model_path = variant_path(variant, os.path.dirname(builtins.kokoro_model_path))
+    if model_path == builtins.kokoro_model_path:
+        return builtins.kokoro_instance, model_path
+    with _engines_lock:
+        if model_path not in _engines:
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Model file not found: {model_path}")
+            kokoro_mod = importlib.import_module("kokoro_onnx")
+            session = create_session(model_path, getattr(builtins, 'kokoro_session_config', None), report=lambda msg: None)
+            _engines[model_path] = kokoro_mod.Kokoro.from_session(session, builtins.kokoro_voices_path)
+        return _engines[model_path], model_path
+
+
+def _average_spectrum_db(samples, frame=1024):
+    np = builtins.np
+    samples = np.asarray(samples, dtype=np.float32)
+    frames = len(samples) // frame
+    if frames < 1:
+        samples = np.pad(samples, (0, frame - len(samples)))
+        frames = 1
+    window = np.hanning(frame).astype(np.float32)
+    blocks = samples[:frames * frame].reshape(frames, frame) * window
+    spectrum = np.abs(np.fft.rfft(blocks, axis=1)).mean(axis=0)
+    return 20 * np.log10(spectrum + 1e-6)
+
+
+def compare_outputs(reference, samples):
+    """(relative duration difference, mean spectral difference in dB) between two renders of the same text."""
+    duration_diff = abs(len(samples) - len(reference)) / max(len(reference), 1)
+    spectral_diff = float(builtins.np.mean(builtins.np.abs(_average_spectrum_db(samples) - _average_spectrum_db(reference))))
+    return duration_diff, spectral_diff
+
+
+def benchmark_variants(phonemes, is_phonemes, voice, speed=1.0, variants=None, runs=BENCHMARK_RUNS, report=print):
+    """
+        Renders the sample on each variant (one warm-up, then the best of `runs`).
+        Returns (results, recommended variant); every result is a dict with the variant, its real-time
+        factor, the duration/spectral difference to fp32 and whether it is close enough to use. Without
+        an fp32 render to compare with, the differences are None and no variant counts as acceptable.
+    """
+    variants = variants or available_variants(os.path.dirname(builtins.kokoro_model_path))
+    if DEFAULT_VARIANT not in variants:
+        variants = [DEFAULT_VARIANT] + list(variants)
+
+    results = []
+    reference = None
+    for variant in variants:
+        try:
+            kokoro, _ = get_variant_engine(variant)
+            samples, sample_rate = kokoro.create(phonemes, voice=voice, speed=speed, is_phonemes=is_phonemes)
+            best = None
+            for _ in range(runs):
+                start = time.perf_counter()
+                samples, sample_rate = kokoro.create(phonemes, voice=voice, speed=speed, is_phonemes=is_phonemes)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        except Exception as e:
+            report(f"Benchmark: {variant} failed: {e}")
+            continue
+
+        if variant == DEFAULT_VARIANT:
+            reference = samples
+        result = {
+            "variant": variant,
+            "rtf": best / (len(samples) / sample_rate),
+            "seconds": best,
+            "duration_diff": None,
+            "spectral_diff_db": None,
+            "acceptable": False,
+        }
+        results.append(result)
+        if reference is None:
+            report(f"Benchmark: {variant}: RTF {result['rtf']:.3f}, not compared, there's no fp32 render to compare with")
+            continue
+        duration_diff, spectral_diff = compare_outputs(reference, samples)
+        result.update(
+            duration_diff=duration_diff,
+            spectral_diff_db=spectral_diff,
+            acceptable=duration_diff <= MAX_DURATION_DIFF and spectral_diff <= MAX_SPECTRAL_DIFF_DB,
+        )
+        report(f"Benchmark: {variant}: RTF {result['rtf']:.3f}, length {duration_diff * 100:.1f}% off, spectrum {spectral_diff:.2f} dB off fp32")
+
+    acceptable = [result for result in results if result["acceptable"]]
+    recommended = min(acceptable, key=lambda result: result["rtf"])["variant"] if acceptable else DEFAULT_VARIANT
+    return results, recommended
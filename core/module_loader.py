@@ -17,9 +17,23 @@ import zipfile
 import shutil
 
 from core.signals import global_signals
+from core.paths import get_app_root
+from core.utils import settings_manager
+from core.model_variants import DEFAULT_VARIANT, parse_variant_choices, variant_file, variant_url
+from core.engine_loader import (add_bundled_libs_to_path, add_external_packages_to_dll_path, import_audio_modules, import_kokoro,
+                                create_engine, publish_engine)
+from core.engine_registry import get_g2p
+from core.renderer import LANGUAGE_MAPPING
+from core.env_fingerprint import fingerprint_matches, save_fingerprint, clear_fingerprint
+from core.model_manifest import ModelManifest
+from core import downloader
+from core.startup_graph import StartupGraph, StartupStep, StartupStopped
 
 LOADER_ERROR_LOG_FILE = "error_debug.log"
 
+class PackageCheckFailed(Exception):
+    pass
+
 def log_loader_error(message):
     """Helper function to append loader errors to the dedicated log file."""
     try:
@@ -38,59 +52,6 @@ def log_loader_error(message):
         print(f"CRITICAL: Failed to write to loader error log '{LOADER_ERROR_LOG_FILE}': {log_e}")
         print(f"Original Error Message:\n{message}")
 
-def add_bundled_libs_to_path():
-    """Adds the bundled_libs directory to sys.path and the DLL search path."""
-    try:
-        # Determine base_dir (handle frozen/script mode)
-        if getattr(sys, 'frozen', False):
-            base_dir = os.path.join(os.path.dirname(sys.executable), '_internal', 'core')
-            if not os.path.isdir(base_dir):
-                 base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-
-        bundled_libs_path = os.path.join(base_dir, 'bundled_libs')
-
-        # --- Check if bundled_libs directory itself exists ---
-        if os.path.isdir(bundled_libs_path):
-            added_to_sys_path = False
-            if bundled_libs_path not in sys.path:
-                sys.path.insert(0, bundled_libs_path)
-                print(f"INFO: Added bundled libraries path to sys.path: {bundled_libs_path}")
-                importlib.invalidate_caches()
-                added_to_sys_path = True
-            else:
-                print(f"INFO: Bundled libraries path already in sys.path: {bundled_libs_path}")
-                added_to_sys_path = True
-
-            dll_path_added = False
-            if sys.platform == 'win32' and hasattr(os, 'add_dll_directory'):
-                try:
-                    abs_bundled_libs_path = os.path.abspath(bundled_libs_path)
-                    print(f"INFO: Attempting to add bundled libs to DLL search path: {abs_bundled_libs_path}")
-                    os.add_dll_directory(abs_bundled_libs_path)
-                    print(f"INFO: Successfully added bundled libs to DLL search path.")
-                    dll_path_added = True
-                except OSError as e_dll_os:
-                    print(f"WARNING: Failed to add bundled libs path '{abs_bundled_libs_path}' to DLL search path: {e_dll_os}")
-                except Exception as e_dll:
-                    print(f"WARNING: Unexpected error adding bundled libs path to DLL search path: {e_dll}")
-            elif sys.platform != 'win32':
-                dll_path_added = True
-                print("INFO: Not on Windows, skipping DLL search path addition.")
-            else:
-                print("WARNING: os.add_dll_directory not available. Bundled DLLs might not be found by dependent libraries.")
-
-            return added_to_sys_path
-        else:
-            print(f"WARNING: Bundled libraries path not found: {bundled_libs_path}")
-            return False
-    except Exception as e:
-        print(f"ERROR: Failed to configure bundled libs path: {e}")
-        print(traceback.format_exc())
-        return False
-
-
 BUNDLED_LIBS_ADDED = add_bundled_libs_to_path()
 if not BUNDLED_LIBS_ADDED:
      print("WARNING: Could not set up bundled libraries path. Features requiring bundled libs might fail.")
@@ -128,11 +89,7 @@ class ModuleLoaderThread(QThread):
 
     def _get_app_root(self):
         """Determines the application's root directory."""
-        if getattr(sys, 'frozen', False):
-            return os.path.dirname(sys.executable)
-        else:
-            core_dir = os.path.dirname(os.path.abspath(__file__))
-            return os.path.dirname(core_dir)
+        return get_app_root()
 
     def __init__(self, callback_function=None, message_callback_target=None, progress_bar_widget=None, download_callback_target=None, downState_callback_target=None):
         super().__init__()
@@ -201,8 +158,6 @@ class ModuleLoaderThread(QThread):
             ("soundfile", "Soundfile audio library", None, None),
             ("ordered_set", "OrderedSet data structure", None, None),
             ("numpy", "NumPy computing library", None, None),
-            ("torch", "Torch", "2.5", None),
-            ("torchaudio", "Torch Audio", "2.5", None), 
             ("onnxruntime", "ONNX Runtime", "1.20.1", None),
             ("kokoro_onnx", "Kokoro ONNX engine", None, None),
             ("fugashi", "Japanese tokenizer", None, None),
@@ -239,6 +194,11 @@ class ModuleLoaderThread(QThread):
         elif not os.path.isdir(ext_pkg_dir):
             self.safe_message(f"External packages directory {ext_pkg_dir} does not exist yet.")
 
+        # Nothing changed since the last successful check: skip it, it imports some packages just to read their version
+        if fingerprint_matches(required_modules, ext_pkg_dir):
+            self.safe_message("Packages unchanged since the last check, skipping it.")
+            return True
+
         missing_packages = []
         self.safe_message("Checking required modules...")
         for pkg_name, desc, version, import_name in required_modules:
@@ -297,13 +257,10 @@ class ModuleLoaderThread(QThread):
 
             self.safe_message(f"Calling external_install_packages for: {packages_spec}")
 
-            self.signal_next_milestone(50)
-
             result = self.external_install_packages(packages_spec, ext_pkg_dir)
             self.safe_message(f"external_install_packages returned: {result}")
 
             if result:
-                self.safe_loading_progress(50.0)
                 self.safe_message("Installation reported success. Proceeding with path/cache update.")
                 if ext_pkg_dir not in sys.path:
                     self.safe_message(f"Attempting to add {ext_pkg_dir} to sys.path...")
@@ -316,16 +273,23 @@ class ModuleLoaderThread(QThread):
                 importlib.invalidate_caches()
                 self.safe_message("Successfully invalidated import caches.")
                 self.safe_message("External installation successful. Module checks complete.")
+                self.store_environment_fingerprint(required_modules, ext_pkg_dir)
                 return True
             else:
-                self.safe_loading_progress(50.0)
                 self.safe_message("External installation failed for packages: " + ", ".join(packages_spec))
                 return False
         else:
             self.safe_message("All required packages seem to be present and versions match.")
-            self.safe_loading_progress(50.0)
+            self.store_environment_fingerprint(required_modules, ext_pkg_dir)
             return True
 
+    def store_environment_fingerprint(self, required_modules, ext_pkg_dir):
+        try:
+            if not save_fingerprint(required_modules, ext_pkg_dir):
+                self.safe_message("Could not fingerprint the packages, the full check will run on the next start too.")
+        except Exception as e:
+            log_loader_error(f"Could not save the environment fingerprint: {e}\n{traceback.format_exc()}")
+
     def external_install_packages(self, packages_spec, ext_pkg_dir):
         """Installs packages using uv, attempting to provide progress feedback."""
         self.safe_message(f"Attempting package installation using uv: {packages_spec}")
@@ -415,7 +379,6 @@ class ModuleLoaderThread(QThread):
 
     def run(self):
         uv_exe = None
-        install_pkgs_error_msg = None
 
         # Define where the install step progress should end
         # install_steps_start = 55 # Matches uv_process_max in external_install_packages
@@ -444,124 +407,9 @@ class ModuleLoaderThread(QThread):
 
             self.safe_message("Initializing modules...")
             self.safe_loading_progress(5.0)
-            self.signal_next_milestone(45) # Next major step is end of install (60%)
-            self.safe_message("Checking/installing required packages...")
 
-            # --- Call check_and_install ---
-            install_success = self.check_and_install_missing_modules()
-
-            if not install_success:
-                install_pkgs_error_msg = "Package check/installation failed. Cannot proceed."
-                log_loader_error(install_pkgs_error_msg + "\nCheck uv_install_log.txt for details.")
-                self.safe_message(install_pkgs_error_msg)
-                self.error.emit("Failed to install required packages.")
-                return
-
-            # --- If install successful, proceed ---
-            self.safe_message("Package check/install process complete.")
-
-            # --- Add external_packages to DLL search path ---
             try:
-                if getattr(sys, 'frozen', False):
-                    base_dir = os.path.dirname(sys.executable)
-                    ext_pkg_dir = os.path.join(base_dir, "external_packages")
-                else:
-                    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    ext_pkg_dir = os.path.join(project_root, "external_packages")
-
-                if os.path.isdir(ext_pkg_dir):
-                    if sys.platform == 'win32' and hasattr(os, 'add_dll_directory'):
-                        try:
-                            abs_ext_pkg_path = os.path.abspath(ext_pkg_dir)
-                            self.safe_message(f"Attempting to add external packages dir to DLL search path: {abs_ext_pkg_path}")
-                            os.add_dll_directory(abs_ext_pkg_path)
-                            self.safe_message(f"Successfully added external packages dir to DLL search path.")
-                        except OSError as e_dll_os_ext:
-                            self.safe_message(f"WARNING: Failed to add external packages path '{abs_ext_pkg_path}' to DLL search path: {e_dll_os_ext}")
-                        except Exception as e_dll_ext:
-                            self.safe_message(f"WARNING: Unexpected error adding external packages path to DLL search path: {e_dll_ext}")
-                else:
-                    self.safe_message(f"WARNING: External packages directory {ext_pkg_dir} not found after install, cannot add to DLL path.")
-            except Exception as e_add_ext_path:
-                 self.safe_message(f"ERROR: Failed during setup of external packages DLL path: {e_add_ext_path}\n{traceback.format_exc()}")
-
-
-            try:
-
-                self.safe_message("Verifying model files...")
-                self.signal_next_milestone(45)
-                self._verify_model_files() # Contains download logic which might take time if downloading
-                self.safe_loading_progress(45.0)
-                self.safe_message("Model file verification complete.")
-
-                self.safe_message("Invalidating import caches (pre-import)...")
-                importlib.invalidate_caches()
-
-                self.safe_message("Importing core modules...")
-
-                self.safe_message("Importing soundfile & numpy...")
-                self.signal_next_milestone(55)
-                sf = importlib.import_module("soundfile")
-                np = importlib.import_module("numpy")
-                self.safe_loading_progress(55.0)
-
-                self.safe_message("Importing torch ...")
-                self.signal_next_milestone(70)
-                torch_mod = importlib.import_module("torch")
-                try:
-                    torch_lib_path = os.path.join(os.path.dirname(torch_mod.__file__), 'lib')
-                    if os.path.isdir(torch_lib_path) and hasattr(os, 'add_dll_directory'):
-                        os.add_dll_directory(torch_lib_path)
-                except Exception as dll_e:
-                    self.safe_message(f"ERROR attempting to add torch lib path: {dll_e}")
-                self.safe_loading_progress(70.0)
-
-                self.safe_message("Importing torchaudio...")
-                self.signal_next_milestone(80)
-                torchaudio_mod = importlib.import_module("torchaudio")
-                self.safe_loading_progress(80.0)
-
-                self.safe_message("Importing misaki, G2P, jtalk, kokoro...")
-                self.signal_next_milestone(85)
-                espeak = importlib.import_module("misaki.espeak")
-                EspeakG2P = getattr(espeak, "EspeakG2P")
-                ja_g2p_module = importlib.import_module("misaki.ja")
-                zh_g2p_module = importlib.import_module("misaki.zh")
-                pyopenjtalk_mod = importlib.import_module("pyopenjtalk")
-                if 'bundled_libs' not in pyopenjtalk_mod.__file__:
-                    self.safe_message("WARNING: Imported pyopenjtalk may not be the bundled version!")
-                kokoro_mod = importlib.import_module("kokoro_onnx")
-                self.safe_loading_progress(85.0)
-
-                self.safe_message("Modules imported successfully.")
-
-
-                self.safe_message("Instantiating Kokoro TTS engine...")
-                self.signal_next_milestone(95)
-                app_root = self._get_app_root()
-                model_dir = os.path.join(app_root, 'models', 'kokoro')
-                kokoro_model_path = os.path.join(model_dir, 'kokoro-v1.0.onnx')
-                voices_path = os.path.join(model_dir, 'voices-v1.0.bin')
-                if not os.path.exists(kokoro_model_path): raise FileNotFoundError(f"Kokoro model not found: {kokoro_model_path}")
-                if not os.path.exists(voices_path): raise FileNotFoundError(f"Voices file not found: {voices_path}")
-                instance = kokoro_mod.Kokoro(kokoro_model_path, voices_path)
-                self.safe_message("Kokoro instance created.")
-                self.safe_loading_progress(95.0)
-
-                self.safe_message("Assigning modules to builtins...")
-                self.signal_next_milestone(100)
-                builtins.sf = sf
-                builtins.np = np
-                builtins.torch = torch_mod
-                builtins.torchaudio = torchaudio_mod
-                builtins.kokoro_instance = instance
-                builtins.espeak_instance = espeak
-                builtins.g2p_instance = EspeakG2P
-
-                self.safe_message("Instantiating G2P converters...") # Quick, included in Kokoro step time
-                builtins.ja_g2p_instance = ja_g2p_module.JAG2P()
-                builtins.zh_g2p_instance = zh_g2p_module.ZHG2P()
-                self.safe_message("G2P converters instantiated.")
+                self.run_startup_graph()
 
                 self.safe_loading_progress(100.0)
                 self.safe_message("Calling success callback...")
@@ -573,7 +421,14 @@ class ModuleLoaderThread(QThread):
                 self.safe_message("--- Module Loader Thread Finished Successfully ---")
                 self.loading_successful = True
 
+            except StartupStopped:
+                self.safe_message("Stop requested, startup cancelled.")
+            except PackageCheckFailed as e_packages:
+                log_loader_error(f"{e_packages}\nCheck uv_install_log.txt for details.")
+                self.safe_message(str(e_packages))
+                self.error.emit("Failed to install required packages.")
             except ImportError as e_import:
+                clear_fingerprint() # the packages are not what the fingerprint says, check them properly next time
                 import_error_msg = f"ERROR during module import: {str(e_import)}\n{traceback.format_exc()}"
                 log_loader_error(import_error_msg)
                 self.safe_message(f"ERROR during module import: {str(e_import)}")
@@ -604,7 +459,84 @@ class ModuleLoaderThread(QThread):
             else:
                 self.safe_message("Exit status: Failure or Incomplete")
 
+    def run_startup_graph(self):
+        """
+            Package check, model check, imports and engine creation as a dependency graph (see
+            core/startup_graph.py). Weights are the percentages of the progress bar, from 5 to 100.
+        """
+        model_dir = os.path.join(self._get_app_root(), 'models', 'kokoro')
+        session_config = self.session_config()
+
+        def check_packages(results):
+            self.safe_message("Checking/installing required packages...")
+            if not self.check_and_install_missing_modules():
+                raise PackageCheckFailed("Package check/installation failed. Cannot proceed.")
+            self.safe_message("Package check/install process complete.")
+            add_external_packages_to_dll_path(self.safe_message)
+
+        def verify_models(results):
+            self.safe_message("Verifying model files...")
+            if not self._verify_model_files(): # Contains download logic which might take time if downloading
+                raise RuntimeError("Failed to obtain necessary model files.")
+            self.safe_message("Model file verification complete.")
+
+        def build_frontend(results):
+            # The frontend of the language the dock will open with, the others are still built on first use
+            language_code = LANGUAGE_MAPPING.get(settings_manager.get('TTS/Language'))
+            if language_code in (None, 'en-us', 'en-gb'):
+                return
+            try:
+                get_g2p(language_code)
+                self.safe_message(f"{language_code} frontend loaded.")
+            except Exception as e:
+                self.safe_message(f"Could not load the {language_code} frontend, it will be retried on first use: {e}")
+
+        graph = StartupGraph([
+            StartupStep("packages", check_packages, weight=45),
+            StartupStep("models", verify_models, weight=5),
+            StartupStep("audio_modules", lambda r: import_audio_modules(self.safe_message), needs=["packages"], weight=5),
+            StartupStep("kokoro_module", lambda r: import_kokoro(self.safe_message), needs=["audio_modules"], weight=30),
+            StartupStep("engine", lambda r: create_engine(r["kokoro_module"], model_dir, session_config, self.safe_message),
+                        needs=["kokoro_module", "models"], weight=8),
+            StartupStep("frontend", build_frontend, needs=["audio_modules"], weight=2),
+        ])
+
+        # The bar stands where the finished steps add up to and heads for where the running ones will take it
+        total = {"done": 5.0, "running": 0.0, "milestone": 5}
+        def on_start(step):
+            total["running"] += step.weight
+            milestone = int(total["done"] + total["running"])
+            if milestone > total["milestone"]:
+                total["milestone"] = milestone
+                self.signal_next_milestone(milestone)
+
+        def on_finish(step, seconds):
+            total["running"] -= step.weight
+            total["done"] += step.weight
+            self.safe_message(f'Startup step "{step.name}" done in {seconds:.2f}s.')
+            self.safe_loading_progress(total["done"])
+
+        def on_error(step, error):
+            self._stop_requested = True # cancels a model download still running, its result isn't needed anymore
+
+        results = graph.run(on_start=on_start, on_finish=on_finish, on_error=on_error,
+                            should_stop=lambda: self._stop_requested)
+        sf, np = results["audio_modules"]
+        publish_engine(sf, np, results["engine"], session_config, self.safe_message)
+        self.safe_message("Modules imported successfully.")
+
+    def session_config(self):
+        """ONNX Runtime session settings, see core/onnx_session.py."""
+        return {
+            "intra_op_threads": int(settings_manager.get('ONNX/IntraOpThreads', 0) or 0),
+            "inter_op_threads": int(settings_manager.get('ONNX/InterOpThreads', 0) or 0),
+            "execution_mode": str(settings_manager.get('ONNX/ExecutionMode', 'sequential')),
+            "graph_optimization": str(settings_manager.get('ONNX/GraphOptimization', 'all')),
+            "cache_optimized_model": str(settings_manager.get('ONNX/CacheOptimizedModel', True)).lower() == 'true',
+        }
+
     def _verify_model_files(self):
+        """Checks the model files and downloads what's missing or damaged. Returns False if a required one is unavailable."""
         self.safe_message("Checking for required model files...")
         all_success = True
 
@@ -627,118 +559,135 @@ class ModuleLoaderThread(QThread):
                  os.makedirs(directory, exist_ok=True) 
              except OSError as e:
                   self.safe_message(f"ERROR: Failed to create model directory {directory}: {e}")
-                  self.error.emit(f"Failed to create model directory: {e}")
-                  return
+                  return False
 
 
+        # Sizes and checksums are checked against the local manifest; asking GitHub is opt-in
+        manifest = ModelManifest(directory)
+        verify_online = str(settings_manager.get('MODELS/VerifyOnline', False)).lower() == 'true'
+
         for file in files:
             if self._stop_requested:
                 self.safe_message("Model check stopped by request.")
-                return
+                return False
 
             file_path = os.path.join(directory, file)
             self.safe_message(f'Verifying file: "{file_path}"')
 
             if not os.path.exists(file_path):
                 self.safe_message(f'"{file}" not found. Starting download...')
-                success = self.download_file(urls[file], file_path)
-                if not success:
+                if not self._download_model_file(urls[file], file_path, manifest):
                     self.safe_message(f'Download failed for "{file}".')
                     all_success = False
                 else:
                      self.safe_message(f'Download successful for "{file}".')
-            else:
-                self.safe_message(f'"{file}" found locally. Verifying size...')
+                continue
+
+            try:
+                ok, message = manifest.verify(file_path)
+            except OSError as e:
+                ok, message = False, f'Error verifying "{file}": {e}.'
+            self.safe_message(message)
+
+            if ok and verify_online:
+                ok = self._remote_size_matches(urls[file], file_path)
+
+            if not ok:
+                self.safe_message(f'Redownloading "{file}"...')
+                try: os.remove(file_path)
+                except OSError as e: self.safe_message(f"Warning: Could not remove existing file {file_path}: {e}")
+                if not self._download_model_file(urls[file], file_path, manifest):
+                    self.safe_message(f'Redownload failed for "{file}".')
+                    all_success = False
+                else:
+                     self.safe_message(f'Redownload successful for "{file}".')
+
+        # fp16/int8 variants are only fetched once they're picked for a language in the TTS dock.
+        # They're optional, the standard model is used if one can't be downloaded.
+        for variant in sorted(set(parse_variant_choices(settings_manager.get('TTS/ModelVariants', '{}')).values()) - {DEFAULT_VARIANT}):
+            if self._stop_requested:
+                return False
+            file_path = os.path.join(directory, variant_file(variant))
+            if os.path.exists(file_path):
                 try:
-                    response = requests.head(urls[file], allow_redirects=True, timeout=10)
-                    response.raise_for_status()
-                    expected_size = int(response.headers.get('content-length', -1))
-                    actual_size = os.path.getsize(file_path)
-
-                    if expected_size > 0:
-                        if actual_size == expected_size:
-                            self.safe_message(f'"{file}" size verified: {actual_size} bytes.')
-                        else:
-                            self.safe_message(f'"{file}" size mismatch! Expected {expected_size}, got {actual_size}. Redownloading...')
-                            try: os.remove(file_path)
-                            except OSError as e: self.safe_message(f"Warning: Could not remove existing file {file_path}: {e}")
-                            success = self.download_file(urls[file], file_path)
-                            if not success:
-                                self.safe_message(f'Redownload failed for "{file}".')
-                                all_success = False
-                            else:
-                                 self.safe_message(f'Redownload successful for "{file}".')
-                    else:
-                        self.safe_message(f'Could not verify size for "{file}" (content-length header missing). Assuming OK.')
-
-                except requests.RequestException as e:
-                    self.safe_message(f'Error checking remote size for "{file}": {e}. Skipping size check.')
-                except Exception as e:
-                    self.safe_message(f'Error verifying "{file}": {e}. Attempting redownload...')
-                    try: os.remove(file_path)
-                    except OSError as e_rem: self.safe_message(f"Warning: Could not remove existing file {file_path}: {e_rem}")
-                    success = self.download_file(urls[file], file_path)
-                    if not success:
-                        self.safe_message(f'Redownload failed for "{file}".')
-                        all_success = False
-                    else:
-                         self.safe_message(f'Redownload successful for "{file}".')
+                    ok, message = manifest.verify(file_path)
+                except OSError as e:
+                    ok, message = False, f'Error verifying "{variant_file(variant)}": {e}.'
+                self.safe_message(message)
+                if ok:
+                    continue
+                try: os.remove(file_path)
+                except OSError as e: self.safe_message(f"Warning: Could not remove existing file {file_path}: {e}")
+            self.safe_message(f'"{variant_file(variant)}" ({variant} model) not found or damaged. Starting download...')
+            if not self._download_model_file(variant_url(variant), file_path, manifest):
+                self.safe_message(f'Download failed for "{variant_file(variant)}", the standard model will be used instead.')
+
+        try:
+            manifest.save()
+        except OSError as e:
+            self.safe_message(f"Warning: Could not save the model manifest: {e}")
 
         if all_success:
             self.safe_message("All required model files verified successfully.")
             self.global_signals.files_ready.emit()
         else:
             self.safe_message("ERROR: Some required model files could not be downloaded or verified.")
-            self.error.emit("Failed to obtain necessary model files.")
+        return all_success
+
 
+    def _download_model_file(self, url, file_path, manifest):
+        """Downloads a model file and records it in the manifest as the known good copy."""
+        manifest.forget(file_path)
+        if not self.download_file(url, file_path):
+            return False
+        file = os.path.basename(file_path)
+        try:
+            self.safe_message(f'Computing the checksum of "{file}"...')
+            manifest.record(file_path)
+        except OSError as e:
+            self.safe_message(f'Warning: Could not checksum "{file_path}": {e}')
+        return True
+
+    def _remote_size(self, url, file):
+        """The server's content-length of a model file, or None if it can't be asked."""
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=10)
+            response.raise_for_status()
+            expected_size = int(response.headers.get('content-length', -1))
+        except (requests.RequestException, ValueError) as e:
+            self.safe_message(f'Error checking remote size for "{file}": {e}.')
+            return None
+        if expected_size <= 0:
+            self.safe_message(f'Could not get the size of "{file}" from the server (content-length header missing).')
+            return None
+        return expected_size
+
+    def _remote_size_matches(self, url, file_path):
+        """Compares the file size with the server's content-length (MODELS/VerifyOnline). Network errors count as a match."""
+        file = os.path.basename(file_path)
+        expected_size = self._remote_size(url, file)
+        if expected_size is None:
+            self.safe_message(f'Skipping the size check of "{file}".')
+            return True
+
+        actual_size = os.path.getsize(file_path)
+        if actual_size != expected_size:
+            self.safe_message(f'"{file}" size mismatch! Expected {expected_size}, got {actual_size}.')
+            return False
+        self.safe_message(f'"{file}" size verified against the server: {actual_size} bytes.')
+        return True
 
     def download_file(self, url, destination, retries=10, backoff_factor=1):
+        """Resumable download (see core/downloader.py), progress goes to the splash's download bar."""
         self.safe_download_progress(0)
-        for attempt in range(retries):
-            if self._stop_requested: return False
-            try:
-                with requests.get(url, stream=True, timeout=30) as response:
-                    response.raise_for_status()
-                    total_size = int(response.headers.get('content-length', 0))
-                    downloaded = 0
-                    self.safe_message(f'Initiating download for "{os.path.basename(destination)}" (expected size: {total_size} bytes)...')
-
-
-                    last_progress = -1
-                    with open(destination, 'wb') as file:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if self._stop_requested:
-                                try: os.remove(destination)
-                                except OSError: pass
-                                return False
-                            file.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0:
-                                progress = int((downloaded / total_size) * 100)
-                                if progress != last_progress:
-                                    self.safe_download_progress(progress)
-                                    last_progress = progress
-
-                    if total_size > 0:
-                        actual_size = os.path.getsize(destination)
-                        if actual_size != total_size:
-                            try: os.remove(destination)
-                            except OSError: pass
-                            raise IOError(f"Size mismatch: {actual_size} vs {total_size} bytes")
-
-                    self.safe_message(f'Download of "{os.path.basename(destination)}" completed.')
-                    self.safe_download_progress(100)
-
-                    return True
-            except Exception as e:
-                if attempt < retries - 1:
-                    wait_time = backoff_factor * (2 ** attempt)
-                    self.safe_message(f'Retrying "{os.path.basename(destination)}" in {wait_time:.1f}s...')
-                    time.sleep(wait_time)
-                else:
-                    self.safe_message(f'Failed to download "{os.path.basename(destination)}": {str(e)}')
-                    return False
-        return False
+        return downloader.download_file(
+            url, destination,
+            on_progress=self.safe_download_progress,
+            on_message=self.safe_message,
+            should_stop=lambda: self._stop_requested,
+            retries=retries,
+            backoff_factor=backoff_factor,
+        )
 
 
 def load_heavy_modules(callback_function, message_callback_target, progress_bar_widget, download_callback_target, downState_callback_target):
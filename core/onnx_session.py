@@ -0,0 +1,109 @@
+# onnx_session.py
+"""
+    ONNX Runtime session for the Kokoro model, built from the session settings.
+
+    With the optimized-model cache on, the first launch lets ONNX Runtime optimize the graph and
+    saves the result under models/kokoro/optimized. Later launches load that file with graph
+    optimization turned off, which is most of the time spent creating a session. A cached file is
+    only reused for the same source model (size and mtime), ONNX Runtime version and optimization level.
+
+    No Qt in here, the render worker processes and the headless renderer use it too.
+"""
+import os
+import json
+import importlib
+
+OPTIMIZED_DIR = 'optimized'
+
+SESSION_DEFAULTS = {
+    "intra_op_threads": 0, # 0 lets ONNX Runtime decide (one per physical core)
+    "inter_op_threads": 0,
+    "execution_mode": "sequential",
+    "graph_optimization": "all",
+    "cache_optimized_model": True,
+}
+
+EXECUTION_MODES = ["sequential", "parallel"]
+GRAPH_OPTIMIZATION_LEVELS = ["disabled", "basic", "extended", "all"]
+
+
+def session_options(rt, config):
+    options = rt.SessionOptions()
+    if config["intra_op_threads"]:
+        options.intra_op_num_threads = int(config["intra_op_threads"])
+    if config["inter_op_threads"]:
+        options.inter_op_num_threads = int(config["inter_op_threads"])
+    options.execution_mode = {
+        "sequential": rt.ExecutionMode.ORT_SEQUENTIAL,
+        "parallel": rt.ExecutionMode.ORT_PARALLEL,
+    }.get(config["execution_mode"], rt.ExecutionMode.ORT_SEQUENTIAL)
+    options.graph_optimization_level = {
+        "disabled": rt.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": rt.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": rt.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": rt.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }.get(config["graph_optimization"], rt.GraphOptimizationLevel.ORT_ENABLE_ALL)
+    return options
+
+
+def optimized_model_path(model_path, level):
+    base = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(os.path.dirname(model_path), OPTIMIZED_DIR, f"{base}.{level}.onnx")
+
+
+def _cache_stamp(rt, model_path, level):
+    stat = os.stat(model_path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns, "onnxruntime": rt.__version__, "level": level}
+
+
+def _read_stamp(path):
+    try:
+        with open(path + ".json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def create_session(model_path, config=None, write_cache=True, report=print):
+    """
+        Returns an InferenceSession for model_path on the CPU.
+        write_cache=False only reuses an optimized model that is already there (the worker processes
+        start together and would otherwise all write the same file).
+    """
+    rt = importlib.import_module("onnxruntime")
+    config = {**SESSION_DEFAULTS, **(config or {})}
+    options = session_options(rt, config)
+    providers = ["CPUExecutionProvider"]
+    level = config["graph_optimization"]
+
+    if not config["cache_optimized_model"] or level == "disabled":
+        return rt.InferenceSession(model_path, sess_options=options, providers=providers)
+
+    cached_path = optimized_model_path(model_path, level)
+    stamp = _cache_stamp(rt, model_path, level)
+    if os.path.exists(cached_path) and _read_stamp(cached_path) == stamp:
+        try:
+            options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_DISABLE_ALL
+            session = rt.InferenceSession(cached_path, sess_options=options, providers=providers)
+            report(f"Loaded the optimized model from {cached_path}")
+            return session
+        except Exception as e:
+            report(f"WARNING: Could not load the optimized model {cached_path}, rebuilding it: {e}")
+            options = session_options(rt, config)
+
+    if not write_cache:
+        return rt.InferenceSession(model_path, sess_options=options, providers=providers)
+
+    try:
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        if os.path.exists(cached_path + ".json"):
+            os.remove(cached_path + ".json") # stale until the new file is complete
+        options.optimized_model_filepath = cached_path
+        session = rt.InferenceSession(model_path, sess_options=options, providers=providers)
+        with open(cached_path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(stamp, f)
+        report(f"Saved the optimized model to {cached_path}")
+        return session
+    except Exception as e:
+        report(f"WARNING: Could not save the optimized model, using the original one: {e}")
+        return rt.InferenceSession(model_path, sess_options=session_options(rt, config), providers=providers)
@@ -0,0 +1,19 @@
+# paths.py
+import os
+import sys
+
+
+def get_app_root():
+    """Determines the application's root directory (next to the executable when frozen)."""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    core_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(core_dir)
+
+
+def get_model_dir():
+    return os.path.join(get_app_root(), 'models', 'kokoro')
+
+
+def get_cache_dir(name):
+    return os.path.join(get_app_root(), 'cache', name)
@@ -0,0 +1,101 @@
+# render_manifest.py
+"""
+    Chunk manifest of the last render, used for incremental re-renders.
+
+    Every chunk of the last render is recorded with a key made from its text and the render
+    settings (language, voice, blend, speed, model), next to the synthesis cache key its audio
+    was stored under. On the next render, chunks whose key is already in the manifest get their
+    audio back from the synthesis cache and skip G2P and inference, so fixing a typo only
+    re-synthesizes the chunks that actually changed. The audio itself is only kept once, in the
+    cache; a chunk the cache has evicted since is simply rendered again.
+"""
+import os
+import json
+import hashlib
+import threading
+
+from core.paths import get_cache_dir
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+
+_manifest = None
+
+
+class RenderManifest:
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._manifest_path = os.path.join(folder, MANIFEST_FILE)
+        self._entries = {} # key -> {"text": chunk text, "cache_key": synthesis cache key}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self._entries = data.get("chunks", {})
+                return
+        except (OSError, ValueError):
+            pass
+        self._entries = {}
+        # Older manifests kept a copy of every chunk's audio next to them
+        for name in os.listdir(self.folder):
+            if name.endswith('.npy'):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+    def _save(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "chunks": self._entries}, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    @staticmethod
+    def chunk_key(text, language, voice, blend_voice, blend_balance, speed, model_path):
+        stat = os.stat(model_path)
+        settings = f"{language}|{voice}|{blend_voice}|{blend_balance}|{float(speed):.3f}|{model_path}:{stat.st_size}:{stat.st_mtime_ns}|"
+        return hashlib.sha256((settings + text).encode('utf-8')).hexdigest()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def lookup(self, key, synthesis_cache):
+        """Returns (samples, sample_rate) if the chunk was in the last render and its audio is still cached, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        audio = synthesis_cache.get(entry["cache_key"], count_miss=False)
+        if audio is None:
+            with self._lock:
+                self._entries.pop(key, None)
+        return audio
+
+    def record(self, key, text, cache_key):
+        with self._lock:
+            self._entries[key] = {"text": text, "cache_key": cache_key}
+
+    def commit(self, keys):
+        """Makes `keys` the manifest of the last render."""
+        keys = set(keys)
+        with self._lock:
+            for key in [k for k in self._entries if k not in keys]:
+                del self._entries[key]
+            self._save()
+
+    def save(self):
+        """Keeps what was recorded so far (after a failed or cancelled render) without dropping anything."""
+        with self._lock:
+            self._save()
+
+
+def get_render_manifest():
+    global _manifest
+    if _manifest is None:
+        _manifest = RenderManifest(get_cache_dir('last_render'))
+    return _manifest
@@ -0,0 +1,233 @@
+# render_pipeline.py
+"""
+    Staged render pipeline: G2P -> inference -> encode.
+
+    G2P and inference each run on their own thread and hand their results to the next stage
+    through small bounded queues, so the G2P of chunk i+1 and the encoding of chunk i-1 overlap
+    with the inference of chunk i. The encode stage runs on the thread that calls run(), which
+    keeps the chunk order intact.
+"""
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+
+RENDER_QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class ChunkError(Exception):
+    """Wraps the first error raised by any stage, with the chunk it happened on."""
+
+    def __init__(self, index, chunk, error, traceback_text):
+        super().__init__(str(error))
+        self.index = index
+        self.chunk = chunk
+        self.error = error
+        self.traceback_text = traceback_text
+
+
+class RenderPipeline:
+    """
+        chunks can be any iterable, the G2P stage takes the next chunk only when it gets to it
+        phonemize(i, chunk) -> (phonemes, is_phonemes)
+        synthesize(i, phonemes, is_phonemes) -> (samples, sample_rate), or a Future resolving to it
+        encode(i, samples, sample_rate) -> None
+        lookup(i, chunk) -> (samples, sample_rate) for chunks whose audio is already known, else None;
+                            those skip G2P and inference and go straight to the encode stage
+        synthesize_batch([(i, phonemes, is_phonemes), ...]) -> list of results, in the same order;
+                            used for up to batch_size chunks at once when that many are waiting in the queue
+        on_queue_wait(i, seconds) -> None; how long a chunk sat in a queue, ready, before the next stage took it
+    """
+
+    def __init__(self, chunks, phonemize, synthesize, encode, is_cancelled=None, on_chunk_start=None, queue_size=RENDER_QUEUE_SIZE, inference_queue_size=None, lookup=None, synthesize_batch=None, batch_size=1, on_queue_wait=None):
+        self.chunks = chunks
+        self.lookup = lookup
+        self.synthesize_batch = synthesize_batch
+        self.batch_size = batch_size if synthesize_batch else 1
+        self.phonemize = phonemize
+        self.synthesize = synthesize
+        self.encode = encode
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.on_chunk_start = on_chunk_start
+        self.queue_size = queue_size
+        # With a worker pool the inference stage only submits, so this queue is what keeps the workers busy
+        self.inference_queue_size = inference_queue_size or queue_size
+        self.on_queue_wait = on_queue_wait
+        self._ready_at = {} # (stage, chunk index) -> when it was handed to that stage's queue
+
+        self._stop = threading.Event()
+        self._error = None
+        self._error_lock = threading.Lock()
+
+    def run(self):
+        """Runs all the stages; returns False if the render was cancelled, raises ChunkError on failure."""
+        phonemes_queue = queue.Queue(maxsize=self.queue_size)
+        audio_queue = queue.Queue(maxsize=self.inference_queue_size)
+
+        threads = [
+            threading.Thread(target=self._g2p_stage, args=(phonemes_queue,), name="render-g2p", daemon=True),
+            threading.Thread(target=self._inference_stage, args=(phonemes_queue, audio_queue), name="render-inference", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._encode_stage(audio_queue)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self._cancel_leftovers(audio_queue)
+
+        if self._error:
+            raise self._error
+        return not self.is_cancelled()
+
+    def _g2p_stage(self, out_queue):
+        chunks = iter(self.chunks)
+        i = 0
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            except Exception as e:
+                self._fail(i, "", e)
+                return
+            try:
+                audio = self.lookup(i, chunk) if self.lookup else None
+                if audio is not None:
+                    item = (i, chunk, None, None, audio)
+                else:
+                    phonemes, is_phonemes = self.phonemize(i, chunk)
+                    item = (i, chunk, phonemes, is_phonemes, None)
+            except Exception as e:
+                self._fail(i, chunk, e)
+                return
+            self._mark_ready("inference", i)
+            if not self._put(out_queue, item):
+                return
+            i += 1
+        self._put(out_queue, _DONE)
+
+    def _inference_stage(self, in_queue, out_queue):
+        done = False
+        while not done:
+            item = self._get(in_queue)
+            if item is _DONE:
+                break
+            batch = [item]
+            # Take whatever else is already waiting, without holding up the first chunk
+            while len(batch) < self.batch_size:
+                try:
+                    item = in_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            for i, chunk, phonemes, is_phonemes, audio in batch:
+                self._report_wait("inference", i)
+                if self.on_chunk_start:
+                    self.on_chunk_start(i)
+            try:
+                results = self._synthesize_items(batch)
+            except ChunkError as e:
+                self._fail(e.index, e.chunk, e.error, e.traceback_text)
+                return
+
+            for (i, chunk, phonemes, is_phonemes, audio), result in zip(batch, results):
+                self._mark_ready("encode", i)
+                if not self._put(out_queue, (i, chunk, result)):
+                    if isinstance(result, Future):
+                        result.cancel()
+                    return
+        self._put(out_queue, _DONE)
+
+    def _synthesize_items(self, batch):
+        results = [audio for (i, chunk, phonemes, is_phonemes, audio) in batch]
+        pending = [n for n, item in enumerate(batch) if item[4] is None]
+
+        if len(pending) > 1:
+            try:
+                batch_results = self.synthesize_batch([(batch[n][0], batch[n][2], batch[n][3]) for n in pending])
+            except Exception as e:
+                # Blame the first chunk of the batch, that's as precise as it gets
+                raise ChunkError(batch[pending[0]][0], batch[pending[0]][1], e, traceback.format_exc())
+            for n, result in zip(pending, batch_results):
+                results[n] = result
+            return results
+
+        for n in pending:
+            i, chunk, phonemes, is_phonemes, audio = batch[n]
+            try:
+                results[n] = self.synthesize(i, phonemes, is_phonemes)
+            except Exception as e:
+                raise ChunkError(i, chunk, e, traceback.format_exc())
+        return results
+
+    def _encode_stage(self, in_queue):
+        while True:
+            item = self._get(in_queue)
+            if item is _DONE:
+                return
+            i, chunk, result = item
+            self._report_wait("encode", i)
+            try:
+                samples, sample_rate = result.result() if isinstance(result, Future) else result
+                self.encode(i, samples, sample_rate)
+            except Exception as e:
+                self._fail(i, chunk, e)
+                return
+
+    def _mark_ready(self, stage, i):
+        if self.on_queue_wait:
+            self._ready_at[(stage, i)] = time.perf_counter()
+
+    def _report_wait(self, stage, i):
+        ready_at = self._ready_at.pop((stage, i), None)
+        if ready_at is not None:
+            self.on_queue_wait(i, time.perf_counter() - ready_at)
+
+    def _put(self, q, item):
+        while not self._should_stop():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._should_stop():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _should_stop(self):
+        if self.is_cancelled():
+            self._stop.set()
+        return self._stop.is_set()
+
+    def _fail(self, i, chunk, error, traceback_text=None):
+        with self._error_lock:
+            if self._error is None:
+                self._error = ChunkError(i, chunk, error, traceback_text or traceback.format_exc())
+        self._stop.set()
+
+    def _cancel_leftovers(self, audio_queue):
+        # Pool futures that were never encoded would otherwise keep the workers busy
+        while True:
+            try:
+                item = audio_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _DONE and isinstance(item[2], Future):
+                item[2].cancel()
@@ -0,0 +1,94 @@
+# render_pool.py
+"""
+    Process pool used by the parallel render mode.
+
+    Every worker process builds its own Kokoro instance (and its own ONNX Runtime session),
+    so chunks can be synthesized on several cores at once. This module is imported by the
+    worker processes too, so it must stay free of PyQt imports.
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.onnx_session import create_session
+
+_worker_kokoro = None
+_active_pool = None
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def _init_worker(model_path, voices_path, dll_dirs, threads_per_worker, session_config):
+    """Runs once in every worker process: sets up DLL paths and builds the Kokoro instance."""
+    global _worker_kokoro
+
+    # sys.path is inherited from the parent by multiprocessing, the DLL search path is not
+    if sys.platform == 'win32' and hasattr(os, 'add_dll_directory'):
+        for dll_dir in dll_dirs:
+            try:
+                os.add_dll_directory(dll_dir)
+            except OSError:
+                pass
+
+    import kokoro_onnx
+
+    # Keep each worker on a small slice of the CPU, otherwise N sessions fight over all the cores
+    config = dict(session_config or {}, intra_op_threads=threads_per_worker, inter_op_threads=1)
+    # The optimized model was saved by the main process when it loaded, the workers only read it
+    session = create_session(model_path, config, write_cache=False, report=lambda msg: None)
+    _worker_kokoro = kokoro_onnx.Kokoro.from_session(session, voices_path)
+
+
+def _synthesize(phonemes, voice, speed, is_phonemes):
+    return _worker_kokoro.create(phonemes, voice=voice, speed=speed, is_phonemes=is_phonemes)
+
+
+class KokoroWorkerPool:
+    def __init__(self, model_path, voices_path, workers=None, session_config=None):
+        self.model_path = model_path
+        self.voices_path = voices_path
+        self.workers = workers or default_worker_count()
+        self.session_config = session_config or {}
+
+        threads_per_worker = max(1, default_worker_count() // self.workers)
+        dll_dirs = [os.path.abspath(p) for p in sys.path if os.path.basename(p) in ('external_packages', 'bundled_libs') and os.path.isdir(p)]
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(model_path, voices_path, dll_dirs, threads_per_worker, self.session_config)
+        )
+
+    def matches(self, model_path, voices_path, workers, session_config=None):
+        return (self.model_path, self.voices_path, self.workers, self.session_config) == (model_path, voices_path, workers or default_worker_count(), session_config or {})
+
+    def submit(self, phonemes, voice, speed, is_phonemes):
+        """Queues one chunk; the returned future resolves to (samples, sample_rate)."""
+        return self.executor.submit(_synthesize, phonemes, voice, speed, is_phonemes)
+
+    def shutdown(self, cancel_pending=False):
+        self.executor.shutdown(wait=not cancel_pending, cancel_futures=cancel_pending)
+
+
+def get_worker_pool(model_path, voices_path, workers=None, session_config=None):
+    """
+        Returns the shared worker pool, creating it on first use.
+        The pool is kept alive between renders because starting the workers and loading
+        the model in each of them is the expensive part.
+    """
+    global _active_pool
+    if _active_pool is not None and not _active_pool.matches(model_path, voices_path, workers, session_config):
+        _active_pool.shutdown(cancel_pending=True)
+        _active_pool = None
+    if _active_pool is None:
+        _active_pool = KokoroWorkerPool(model_path, voices_path, workers, session_config)
+    return _active_pool
+
+
+def shutdown_worker_pool():
+    global _active_pool
+    if _active_pool is not None:
+        _active_pool.shutdown(cancel_pending=True)
+        _active_pool = None
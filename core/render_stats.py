@@ -0,0 +1,81 @@
+# render_stats.py
+"""
+    Where the time of a render goes, chunk by chunk: G2P, inference, writing and encoding, plus the
+    splitting (cutting chunks, G2P aside), the drain (waiting for the encoder to catch up) and the
+    fusion (closing the output file) at the end.
+
+    Stages run on different threads, so every update goes through a lock.
+    queue_wait is the time a chunk sat ready in the pipeline's queues, waiting for the next stage.
+    write is the render thread's side of the output (streaming, handing the chunk to the encoder,
+    which blocks while the encoder queue is full), encode the encoder thread's own time on the chunk.
+"""
+import time
+import threading
+
+STAGES = ("g2p", "inference", "write", "encode", "queue_wait")
+
+
+class RenderStats:
+    def __init__(self):
+        self.chunks = {} # chunk index -> {"chars", "audio_seconds", "g2p", "inference", "write", "encode", "queue_wait"}
+        self.split_seconds = 0.0
+        self.drain_seconds = 0.0
+        self.fusion_seconds = 0.0
+        self.started = time.perf_counter()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def _chunk(self, i):
+        return self.chunks.setdefault(i, {"chars": 0, "audio_seconds": 0.0, **{stage: 0.0 for stage in STAGES}})
+
+    def set(self, i, **values):
+        with self._lock:
+            self._chunk(i).update(values)
+
+    def add(self, i, stage, seconds):
+        with self._lock:
+            self._chunk(i)[stage] += seconds
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def wall_seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def totals(self):
+        with self._lock:
+            totals = {stage: sum(chunk[stage] for chunk in self.chunks.values()) for stage in STAGES}
+            totals["audio_seconds"] = sum(chunk["audio_seconds"] for chunk in self.chunks.values())
+        totals["split"] = self.split_seconds
+        totals["drain"] = self.drain_seconds
+        totals["fusion"] = self.fusion_seconds
+        totals["wall"] = self.wall_seconds
+        totals["rtf"] = totals["wall"] / totals["audio_seconds"] if totals["audio_seconds"] else 0.0
+        return totals
+
+    def chunk_metrics(self, i):
+        """One chunk's numbers, times in milliseconds, the way they go out with the chunk metrics signal."""
+        with self._lock:
+            chunk = dict(self._chunk(i))
+        metrics = {"chunk": i, "chars": chunk["chars"], "audio_seconds": round(chunk["audio_seconds"], 3)}
+        metrics.update({f"{stage}_ms": round(chunk[stage] * 1000, 1) for stage in STAGES})
+        return metrics
+
+    def summary_table(self):
+        """Plain-text table of the stage times (total, mean and slowest chunk), for the console."""
+        with self._lock:
+            chunks = {i: dict(chunk) for i, chunk in self.chunks.items()}
+        if not chunks:
+            return ""
+        lines = [f"{'stage':<12}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'slowest':>9}"]
+        for stage in STAGES:
+            times = {i: chunk[stage] * 1000 for i, chunk in chunks.items()}
+            slowest = max(times, key=times.get)
+            lines.append(f"{stage:<12}{sum(times.values()):>12.0f}{sum(times.values()) / len(times):>10.1f}{times[slowest]:>10.1f}{'#' + str(slowest):>9}")
+        totals = self.totals()
+        lines.append(f"{'split':<12}{totals['split'] * 1000:>12.0f}")
+        lines.append(f"{'drain':<12}{totals['drain'] * 1000:>12.0f}")
+        lines.append(f"{'fusion':<12}{totals['fusion'] * 1000:>12.0f}")
+        lines.append(f"{len(chunks)} chunks, {totals['audio_seconds']:.1f}s of audio in {totals['wall']:.1f}s (RTF {totals['rtf']:.3f})")
+        return "\n".join(lines)
@@ -0,0 +1,607 @@
+# renderer.py
+"""
+    The render itself: text -> chunks -> G2P -> inference -> output file.
+
+    No Qt in here. RenderChunksThread wraps a ChunkRenderer for the GUI and the headless
+    batch renderer (cli.py) drives one directly; progress and chunk audio go out through
+    plain callbacks.
+"""
+import os
+import re
+import io
+import json
+import time
+import uuid
+import itertools
+import builtins
+import traceback
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from core.text_chunker import split_text_into_chunks, iter_text_by_tokens, TOKEN_BUDGET, FAST_START_CHARS, FAST_START_TOKENS
+from core.render_pool import get_worker_pool, shutdown_worker_pool
+from core.render_pipeline import RenderPipeline, ChunkError, RENDER_QUEUE_SIZE
+from core.audio_io import BackgroundAudioWriter, encoder_options
+from core.render_manifest import RenderManifest
+from core.voice_styles import get_voice_style_provider
+from core.batch_synthesis import get_batch_synthesizer
+from core.render_stats import RenderStats
+from core.engine_registry import get_g2p
+
+
+RENDER_LOG_FILE = "render_error.log"
+RENDER_METRICS_FILE = "render_metrics.jsonl"
+
+LANGUAGE_MAPPING = {
+    'American English': 'en-us',
+    'British English': 'en-gb',
+    'Japanese': 'ja',
+    'French': 'fr-fr',
+    'Spanish': 'es',
+    'Italian': 'it',
+    'Hindi': 'hi',
+    'Brazilian Portuguese': 'pt-br',
+    'Mandarin Chinese': 'zh',
+}
+
+
+def log_render_error(message):
+    """Helper function to append errors to the log file."""
+    try:
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        with open(RENDER_LOG_FILE, "a", encoding='utf-8') as f:
+            f.write(f"{timestamp} - {message}\n")
+    except Exception as log_e:
+        print(f"Failed to write to render log: {log_e}") # Fallback print
+
+
+def log_render_metrics(record):
+    """Appends one JSON line to the metrics file, next to the error log."""
+    try:
+        with open(RENDER_METRICS_FILE, "a", encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except Exception as log_e:
+        print(f"Failed to write to render metrics: {log_e}")
+
+
+class G2PError(Exception):
+    """Raised when the G2P step returns nothing for a chunk."""
+
+
+def run_g2p(text, language_code):
+    """Phonemes of text from the language's G2P converter, built on first use by the engine registry."""
+    g2p = get_g2p(language_code)
+    if language_code == 'ja':
+        result = g2p(text)
+        return result[0] if isinstance(result, tuple) else result
+    phonemes, _ = g2p(text)
+    return phonemes
+
+
+def phonemize_text(text, language):
+    """(phonemes, is_phonemes) the way the render feeds text to the engine, without any caching."""
+    language_code = LANGUAGE_MAPPING.get(language, 'en-us')
+    if language in ('American English', 'British English'):
+        return text, False
+    if language_code == 'ja' and not re.search(r'[\u3040-\u30FF\u4E00-\u9FFF]', text):
+        return text, False
+    return run_g2p(text, language_code), True
+
+
+def _ignore(*args):
+    pass
+
+
+class ChunkRenderer:
+    """
+        Renders one text to output_file. run() returns (message, output file), with an empty
+        output file when the render failed or was cancelled.
+
+        on_output(message)     console messages
+        on_status(message)     short status line updates
+        on_chunk_file(path)    a chunk was written to temp_folder
+        on_chunk_audio(bytes)  WAV bytes of a chunk, used instead of on_chunk_file when in_memory is set
+        on_chunk_metrics(dict) stage times of a chunk once it is encoded into the output file (see chunk_record)
+        on_chunk_pcm(bytes, sample_rate)  16-bit mono PCM of a chunk for streaming playback, when stream_pcm is set
+        Without a temp_folder and in_memory, chunks only go to the output file.
+    """
+
+    def __init__(self, text, voice, speed, language, kokoro_instance, output_file, blend_voice=None, blend_balance=None, workers=None,
+                 temp_folder=None, in_memory=False, synthesis_cache=None, g2p_cache=None, render_manifest=None, batch_inference=False,
+                 model_path=None, max_chunk_tokens=TOKEN_BUDGET, fast_start=False, encoder_settings=None, metrics_log=False, stream_pcm=False, on_output=None, on_status=None,
+                 on_chunk_file=None, on_chunk_audio=None, on_chunk_metrics=None, on_chunk_pcm=None):
+        self.text = text
+        self.voice = voice
+        self.speed = speed
+        self.language = language
+        self.kokoro = kokoro_instance
+        # The model file behind kokoro_instance, it differs from the loaded one for the fp16/int8 variants
+        self.model_path = model_path or builtins.kokoro_model_path
+        self.blend_voice = blend_voice
+        self.blend_balance = blend_balance
+        self.output_file = output_file
+        # Bitrate/quality of compressed output files, see audio_io.ENCODER_DEFAULTS
+        self.encoder_settings = encoder_settings
+        # None renders on kokoro_instance in this thread, 0 means one worker process per CPU
+        self.workers = workers
+        # Stack chunks that are ready at the same time into one session run (single engine only)
+        self.batch_inference = batch_inference
+        self.max_chunk_tokens = max_chunk_tokens
+        # Small first chunk, growing from there, so playback can start sooner
+        self.fast_start = fast_start
+        # Hand chunks to the player from memory instead of temp files, only the output file touches the disk
+        self.in_memory = in_memory
+        # Hand every chunk to the player as raw PCM before anything else is done with it
+        self.stream_pcm = stream_pcm
+        self.synthesis_cache = synthesis_cache
+        self.g2p_cache = g2p_cache
+        self.render_manifest = render_manifest
+        self.chunk_keys = []
+        self.reused_chunks = set()
+        self.cache_keys = {} # chunk index -> cache key, for chunks that missed the cache and still have to be stored
+        self.chunk_cache_keys = {} # chunk index -> cache key, what the render manifest points at
+        self._half_done_chunks = set() # chunks only one of the render and encoder threads is done with
+        self._metrics_lock = threading.Lock()
+
+        self.on_output = on_output or _ignore
+        self.on_status = on_status or _ignore
+        self.on_chunk_file = on_chunk_file or _ignore
+        self.on_chunk_audio = on_chunk_audio or _ignore
+        self.on_chunk_metrics = on_chunk_metrics or _ignore
+        self.on_chunk_pcm = on_chunk_pcm or _ignore
+        # Also append every chunk's metrics to RENDER_METRICS_FILE
+        self.metrics_log = metrics_log
+
+        self.temp_folder = temp_folder
+        self.chunks = []
+        self.chunk_phonemes = {} # chunk index -> phonemes worked out while chunking
+        self.chunk_files = []
+        self.output_writer = None
+        self.stats = RenderStats()
+        self.render_id = uuid.uuid4().hex[:12]
+        self._is_cancelled = False
+
+    @property
+    def audio_seconds(self):
+        """Length of the audio written to the output file so far."""
+        if not self.output_writer or not self.output_writer.sample_rate:
+            return 0.0
+        return self.output_writer.frames_written / self.output_writer.sample_rate
+
+    def run(self):
+        language_code = LANGUAGE_MAPPING.get(self.language, 'en-us')
+        self.stats = RenderStats()
+        self.chunks = []
+        self.chunk_ends = []
+        self.chunk_keys = []
+        self.total_chunks = None
+        self.chunk_files = []
+        self.reused_chunks = set()
+        self._half_done_chunks = set()
+
+        pool = None
+        if self.workers is not None:
+            try:
+                pool = get_worker_pool(self.model_path, builtins.kokoro_voices_path, self.workers or None,
+                                       getattr(builtins, 'kokoro_session_config', None))
+                self.on_output(f"Parallel render: {pool.workers} worker processes.")
+            except Exception as e:
+                log_render_error(f"Could not start the render worker pool, falling back to a single engine: {e}\nTraceback:\n{traceback.format_exc()}")
+                self.on_output(f"Could not start the render worker pool ({e}). Rendering on a single engine.")
+                pool = None
+
+        try:
+            voice_to_use = get_voice_style_provider(self.kokoro).voice_for(self.voice, self.blend_voice, self.blend_balance)
+        except Exception as e:
+            error_msg = f"Error blending voices {self.voice} and {self.blend_voice}: {str(e)}"
+            log_render_error(error_msg + f"\nTraceback:\n{traceback.format_exc()}")
+            return error_msg, ""
+
+        # The output file is filled chunk by chunk while rendering, so there's nothing left to do after the last one
+        try:
+            self.output_writer = BackgroundAudioWriter(self.output_file, on_encoded=self.chunk_encoded, **encoder_options(self.output_file, self.encoder_settings))
+        except ValueError as e:
+            error_msg = f"Error: can't write the output file {self.output_file}: {str(e)}"
+            log_render_error(error_msg)
+            return error_msg, ""
+
+        if pool:
+            engine_synthesize = lambda phonemes, is_phonemes: pool.submit(phonemes, voice_to_use, self.speed, is_phonemes)
+        else:
+            engine_synthesize = lambda phonemes, is_phonemes: self.kokoro.create(phonemes, voice=voice_to_use, speed=self.speed, is_phonemes=is_phonemes)
+
+        if self.g2p_cache:
+            self.g2p_cache.reset_counters()
+
+        model_id = None
+        if self.synthesis_cache:
+            try:
+                model_id = self.synthesis_cache.model_id(self.model_path)
+                self.synthesis_cache.reset_counters()
+            except Exception as e:
+                log_render_error(f"Synthesis cache disabled for this render, could not hash the model: {e}")
+                self.synthesis_cache = None
+        if self.render_manifest and not self.synthesis_cache:
+            # The manifest only points at synthesis cache entries
+            self.on_output("Incremental render needs the synthesis cache, rendering every chunk.")
+            self.render_manifest = None
+
+        def cached_audio(i, phonemes, is_phonemes):
+            if not self.synthesis_cache:
+                return None
+            key = self.synthesis_cache.make_key(model_id, language_code, phonemes, is_phonemes, voice_to_use, self.speed)
+            self.chunk_cache_keys[i] = key
+            cached = self.synthesis_cache.get(key)
+            if cached is None:
+                self.cache_keys[i] = key
+            return cached
+
+        def synthesize(i, phonemes, is_phonemes):
+            start = time.perf_counter()
+            cached = cached_audio(i, phonemes, is_phonemes)
+            if cached is not None:
+                return cached
+            result = engine_synthesize(phonemes, is_phonemes)
+            if isinstance(result, Future):
+                # Pool chunks: from submission to the worker handing the audio back
+                result.add_done_callback(lambda _: self.stats.add(i, "inference", time.perf_counter() - start))
+            else:
+                self.stats.add(i, "inference", time.perf_counter() - start)
+            return result
+
+        synthesizer = None
+        if self.batch_inference and not pool:
+            synthesizer = get_batch_synthesizer(self.kokoro)
+            if not synthesizer.supported:
+                self.on_output("Batched inference: the model has no batch axis, rendering one chunk at a time.")
+                synthesizer = None
+
+        def report_batch_fallback(message):
+            log_render_error(message)
+            self.on_output(message)
+
+        def synthesize_batch(items):
+            results = {}
+            misses = []
+            for i, phonemes, is_phonemes in items:
+                cached = cached_audio(i, phonemes, is_phonemes)
+                if cached is not None:
+                    results[i] = cached
+                else:
+                    misses.append((i, phonemes, is_phonemes))
+            if misses:
+                start = time.perf_counter()
+                audio = synthesizer.synthesize([(phonemes, is_phonemes) for _, phonemes, is_phonemes in misses], voice_to_use, self.speed, report=report_batch_fallback)
+                for i, _, _ in misses:
+                    self.stats.add(i, "inference", (time.perf_counter() - start) / len(misses))
+                results.update(zip([i for i, _, _ in misses], audio))
+            return [results[i] for i, _, _ in items]
+
+        # Chunks are cut (and, when sized by tokens, phonemized) by the G2P stage as it gets to them,
+        # so the first chunk renders while the rest of the text is still being chunked
+        pipeline = RenderPipeline(
+            self.iter_chunks(language_code),
+            phonemize=lambda i, chunk: self.timed_phonemize(i, chunk, language_code),
+            synthesize=synthesize,
+            encode=self.write_chunk,
+            is_cancelled=lambda: self._is_cancelled,
+            on_chunk_start=self.report_progress,
+            # Enough chunks in flight to keep every worker busy
+            inference_queue_size=pool.workers * 2 if pool else RENDER_QUEUE_SIZE,
+            lookup=self.lookup_previous_render if self.render_manifest else None,
+            synthesize_batch=synthesize_batch if synthesizer else None,
+            batch_size=synthesizer.max_batch if synthesizer else 1,
+            # Room for a full batch to be waiting when the inference stage comes back for more
+            queue_size=synthesizer.max_batch * 2 if synthesizer else RENDER_QUEUE_SIZE,
+            on_queue_wait=lambda i, seconds: self.stats.add(i, "queue_wait", seconds)
+        )
+
+        try:
+            pipeline.run()
+        except ChunkError as e:
+            self.report_cache_stats()
+            self.update_manifest(completed=False)
+            if isinstance(e.error, G2PError):
+                error_msg = str(e.error)
+                log_render_error(error_msg)
+                self.on_output(error_msg)
+            else:
+                if isinstance(e.error, BrokenProcessPool):
+                    # A dead worker takes the whole pool down with it, start a fresh one next render
+                    shutdown_worker_pool()
+                error_msg = f"Error rendering chunk {e.index} ({e.chunk[:30]}...): {str(e.error)}"
+                log_render_error(error_msg + f"\nTraceback:\n{e.traceback_text}")
+            self.discard_output()
+            return error_msg, ""
+
+        self.report_cache_stats()
+        self.update_manifest(completed=not self._is_cancelled)
+
+        # --- Check cancellation *before* finalizing ---
+        if self._is_cancelled:
+            self.cleanup_partial_files()
+            log_render_error("Render cancelled by user before finalizing the output.")
+            return "Render cancelled by user.", ""
+        # ---
+
+        return self.finalize_output()
+
+    def finalize_output(self):
+        self.on_status("Finalizing output file...")
+        self.on_output("Finalizing output file...")
+        try:
+            if not self.output_writer.frames_written:
+                error_msg = "Error in fusion: No audio chunks were successfully generated."
+                log_render_error(error_msg)
+                self.discard_output()
+                return error_msg, ""
+
+            fusion_start = time.perf_counter()
+            fused_file = self.output_writer.close()
+            self.stats.drain_seconds = self.output_writer.drain_seconds
+            self.stats.fusion_seconds = time.perf_counter() - fusion_start - self.output_writer.drain_seconds
+            self.stats.finish()
+            success_msg = f"Fused file created successfully: {fused_file}"
+            self.on_output(success_msg)
+            self.report_timings()
+            return success_msg, fused_file
+        except Exception as e:
+            error_msg = f"Error finalizing output file: {str(e)}"
+            log_render_error(error_msg + f"\nTraceback:\n{traceback.format_exc()}")
+            self.discard_output()
+            return error_msg, ""
+
+    def discard_output(self):
+        if self.output_writer:
+            try:
+                self.output_writer.abort()
+            except Exception as e:
+                log_render_error(f"Error removing partial output file {self.output_writer.partial_path}: {e}")
+
+    def split_text(self, language_code):
+        """
+            (chunk text, phonemes) pairs, lazily. Chunks are sized by phoneme tokens, or by characters (with
+            no phonemes) if the engine can't be asked for a token count.
+        """
+        by_chars = lambda: ((chunk, None) for chunk in split_text_into_chunks(self.text, fast_start=FAST_START_CHARS if self.fast_start else 0))
+        tokenizer = getattr(self.kokoro, 'tokenizer', None)
+        if tokenizer is None:
+            return by_chars()
+
+        def phonemize(text):
+            start = time.perf_counter()
+            try:
+                phonemes, is_phonemes = self.phonemize_chunk(None, text, language_code)
+            except G2PError:
+                return "" # nothing to say in this piece (a lone symbol, say), it costs no tokens
+            finally:
+                self._chunker_g2p_seconds += time.perf_counter() - start
+            # Plain text would be phonemized by kokoro itself, in American English since create() gets no lang
+            return phonemes if is_phonemes else tokenizer.phonemize(text, 'en-us')
+
+        packed = iter_text_by_tokens(self.text, phonemize, lambda phonemes: len(tokenizer.tokenize(phonemes)), self.max_chunk_tokens,
+                                     fast_start=FAST_START_TOKENS if self.fast_start else 0)
+        try:
+            first = next(packed, None)
+        except Exception as e:
+            log_render_error(f"Token-based chunking failed, splitting by characters instead: {e}\nTraceback:\n{traceback.format_exc()}")
+            return by_chars()
+        return itertools.chain([first] if first else [], packed)
+
+    def iter_chunks(self, language_code):
+        """
+            Yields the chunk texts for the G2P stage, recording each one as it's cut: its phonemes, its
+            manifest key and its timings. The G2P run while measuring a chunk counts as that chunk's
+            g2p time, the rest as splitting.
+        """
+        self.chunk_phonemes = {}
+        self._chunker_g2p_seconds = 0.0
+        start = time.perf_counter()
+        chars = 0
+        for chunk, phonemes in self.split_text(language_code):
+            i = len(self.chunks)
+            self.chunks.append(chunk)
+            if phonemes:
+                self.chunk_phonemes[i] = phonemes
+            chars += len(chunk)
+            self.chunk_ends.append(chars)
+            if self.render_manifest:
+                try:
+                    self.chunk_keys.append(RenderManifest.chunk_key(chunk, self.language, self.voice, self.blend_voice, self.blend_balance, self.speed, self.model_path))
+                except Exception as e:
+                    log_render_error(f"Incremental render disabled, could not build the chunk manifest: {e}")
+                    self.render_manifest = None
+
+            elapsed = time.perf_counter() - start
+            self.stats.set(i, chars=len(chunk))
+            self.stats.add(i, "g2p", self._chunker_g2p_seconds)
+            self.stats.split_seconds += elapsed - self._chunker_g2p_seconds
+            yield chunk
+            self._chunker_g2p_seconds = 0.0
+            start = time.perf_counter()
+        self.total_chunks = len(self.chunks)
+
+    def timed_phonemize(self, i, chunk, language_code):
+        start = time.perf_counter()
+        result = self.phonemize_chunk(i, chunk, language_code)
+        self.stats.add(i, "g2p", time.perf_counter() - start)
+        return result
+
+    def phonemize_chunk(self, i, chunk, language_code):
+        """Runs the G2P step for one chunk and returns (phonemes, is_phonemes)."""
+        # Worked out while chunking, for every language: kokoro would otherwise phonemize English again
+        if self.chunk_phonemes.get(i, "").strip():
+            return self.chunk_phonemes[i], True
+
+        if self.language in ('American English', 'British English'):
+            return chunk, False
+
+        if language_code == 'ja' and not re.search(r'[\u3040-\u30FF\u4E00-\u9FFF]', chunk):
+            return chunk, False
+
+        if self.g2p_cache:
+            phonemes = self.g2p_cache.get(language_code, chunk)
+            if phonemes:
+                return phonemes, True
+
+        phonemes = run_g2p(chunk, language_code)
+        if not phonemes:
+            raise G2PError(f"Error rendering chunk {i}: G2P conversion returned empty phoneme sequence for chunk: {chunk[:50]}...")
+        if self.g2p_cache:
+            self.g2p_cache.put(language_code, chunk, phonemes)
+        return phonemes, True
+
+    def write_chunk(self, i, samples, sample_rate):
+        start = time.perf_counter()
+        try:
+            self.encode_chunk(i, samples, sample_rate)
+        finally:
+            self.stats.add(i, "write", time.perf_counter() - start)
+            self.stats.set(i, audio_seconds=len(samples) / sample_rate)
+        self.chunk_done(i)
+
+    def chunk_encoded(self, i, seconds):
+        """Called on the encoder thread once chunk i is in the output file."""
+        self.stats.add(i, "encode", seconds)
+        self.chunk_done(i)
+
+    def chunk_done(self, i):
+        """Sends chunk i's metrics once both the render thread and the encoder are done with it."""
+        with self._metrics_lock:
+            if i not in self._half_done_chunks:
+                self._half_done_chunks.add(i)
+                return
+            self._half_done_chunks.discard(i)
+
+        record = self.chunk_record(i)
+        self.on_chunk_metrics(record)
+        if self.metrics_log:
+            log_render_metrics(dict(record, type="chunk"))
+
+    def chunk_record(self, i):
+        """Stage times of chunk i in ms, with what's needed to group them by render, language and model."""
+        return dict(
+            self.stats.chunk_metrics(i),
+            render=self.render_id,
+            language=self.language,
+            voice=self.voice,
+            model=os.path.basename(self.model_path),
+            workers=self.workers,
+            reused=i in self.reused_chunks,
+        )
+
+    def report_timings(self):
+        table = self.stats.summary_table()
+        if table:
+            self.on_output(f"Render timings:\n{table}")
+        if self.metrics_log:
+            totals = self.stats.totals()
+            log_render_metrics({
+                "type": "render",
+                "render": self.render_id,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "language": self.language,
+                "voice": self.voice,
+                "model": os.path.basename(self.model_path),
+                "workers": self.workers,
+                "chunks": len(self.stats.chunks),
+                **{f"{stage}_ms": round(seconds * 1000, 1) for stage, seconds in totals.items() if stage not in ("audio_seconds", "rtf")},
+                "audio_seconds": round(totals["audio_seconds"], 3),
+                "rtf": round(totals["rtf"], 4),
+            })
+
+    def encode_chunk(self, i, samples, sample_rate):
+        if self.stream_pcm:
+            np = builtins.np
+            self.on_chunk_pcm((np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes(), sample_rate)
+
+        self.output_writer.write(samples, sample_rate, tag=i)
+
+        if self.render_manifest and i not in self.reused_chunks and i in self.chunk_cache_keys:
+            self.render_manifest.record(self.chunk_keys[i], self.chunks[i], self.chunk_cache_keys[i])
+
+        cache_key = self.cache_keys.pop(i, None)
+        if cache_key:
+            try:
+                self.synthesis_cache.put(cache_key, samples, sample_rate)
+            except Exception as e:
+                log_render_error(f"Could not store chunk {i} in the synthesis cache: {e}")
+
+        if self.in_memory:
+            wav_buffer = io.BytesIO()
+            builtins.sf.write(wav_buffer, samples, sample_rate, format='WAV')
+            self.on_chunk_audio(wav_buffer.getvalue())
+            return
+
+        if not self.temp_folder:
+            return
+
+        out_file = os.path.join(self.temp_folder, f"chunk_{i:03d}.wav")
+        builtins.sf.write(out_file, samples, sample_rate)
+        self.chunk_files.append(out_file)
+        self.on_chunk_file(out_file)
+
+    def lookup_previous_render(self, i, chunk):
+        if not self.render_manifest:
+            return None
+        audio = self.render_manifest.lookup(self.chunk_keys[i], self.synthesis_cache)
+        if audio is not None:
+            self.reused_chunks.add(i)
+        return audio
+
+    def update_manifest(self, completed):
+        if not self.render_manifest:
+            return
+        try:
+            if completed:
+                self.render_manifest.commit(self.chunk_keys)
+            else:
+                self.render_manifest.save()
+        except Exception as e:
+            log_render_error(f"Could not save the render manifest: {e}")
+
+    def report_cache_stats(self):
+        if self.render_manifest and self.chunks:
+            self.on_output(f"Incremental render: {len(self.reused_chunks)} of {len(self.chunks)} chunks were unchanged since the last render.")
+
+        if self.g2p_cache and (self.g2p_cache.hits or self.g2p_cache.misses):
+            self.on_output(f"G2P cache: {self.g2p_cache.hits} hits, {self.g2p_cache.misses} misses.")
+
+        if not self.synthesis_cache:
+            return
+        try:
+            self.synthesis_cache.save_index()
+        except Exception as e:
+            log_render_error(f"Could not save the synthesis cache index: {e}")
+        cache = self.synthesis_cache
+        self.on_output(f"Synthesis cache: {cache.hits} hits, {cache.misses} misses ({cache.total_bytes() / (1024 * 1024):.1f} MB on disk).")
+
+    def report_progress(self, i):
+        if self.total_chunks:
+            message = f"Rendering chunk {i + 1} of {self.total_chunks}..."
+        else:
+            # Still chunking the text, so the count isn't known yet
+            message = f"Rendering chunk {i + 1} ({self.chunk_ends[i] * 100 // max(len(self.text), 1)}% of the text)..."
+        self.on_status(message)
+        self.on_output(message)
+
+    def cleanup_partial_files(self):
+        # Clean up files if rendering is cancelled or fails
+        self.discard_output()
+        if not self.chunk_files:
+            return
+        log_render_error(f"Cleaning up partial files in {self.temp_folder}")
+        for file in self.chunk_files:
+            try:
+                if os.path.exists(file):
+                    os.remove(file)
+            except Exception as e:
+                log_render_error(f"Error removing temp file {file}: {e}")
+                pass # Continue cleanup even if one file fails
+
+    def cancel(self):
+        self._is_cancelled = True
+
+    def is_cancelled(self):
+        return self._is_cancelled
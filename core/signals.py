@@ -8,7 +8,10 @@ class GlobalSignals(QObject):
 
     new_render_started = pyqtSignal()
     addChunkToPlayerSignal = pyqtSignal(str)
+    addChunkAudioToPlayerSignal = pyqtSignal(object)
+    addChunkPcmToPlayerSignal = pyqtSignal(bytes, int) # 16-bit mono PCM and its sample rate, for streaming playback
     fused_file_completed = pyqtSignal(bool, str, str)
+    chunk_metrics_signal = pyqtSignal(object) # dict of a chunk's stage times, see ChunkRenderer.chunk_record
 
     startAnimationSignal = pyqtSignal()  # signal to start the spinner
     stopAnimationSignal = pyqtSignal()   # signal to stop the spinner
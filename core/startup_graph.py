@@ -0,0 +1,109 @@
+# startup_graph.py
+"""
+    The loader's startup steps as a dependency graph.
+
+    Each step names the steps it needs and starts on a small thread pool as soon as they are done, so
+    independent steps overlap: the model check runs while the packages are checked and imported, the
+    G2P frontend is built while the ONNX session is created. A cold start then takes about as long as
+    its longest chain of steps instead of the sum of all of them.
+
+    The first failure stops anything new from starting and is raised once the running steps are done.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+STARTUP_WORKERS = 3
+
+
+class StartupStopped(Exception):
+    pass
+
+
+class StartupStep:
+    def __init__(self, name, run, needs=(), weight=1.0):
+        """run(results) gets the results of the finished steps by name; weight is its share of the progress bar."""
+        self.name = name
+        self.run = run
+        self.needs = tuple(needs)
+        self.weight = weight
+
+
+class StartupGraph:
+    def __init__(self, steps):
+        self.steps = {step.name: step for step in steps}
+        for step in steps:
+            for need in step.needs:
+                if need not in self.steps:
+                    raise ValueError(f'Startup step "{step.name}" needs unknown step "{need}"')
+        self._check_cycles()
+
+    def _check_cycles(self):
+        done, visiting = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f'Startup steps have a dependency cycle through "{name}"')
+            visiting.add(name)
+            for need in self.steps[name].needs:
+                visit(need)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.steps:
+            visit(name)
+
+    @staticmethod
+    def _timed(step, results):
+        started = time.perf_counter()
+        result = step.run(results)
+        return result, time.perf_counter() - started
+
+    def run(self, workers=STARTUP_WORKERS, on_start=None, on_finish=None, on_error=None, should_stop=None):
+        """
+            Runs every step and returns their results by name. on_start(step), on_finish(step, seconds) and
+            on_error(step, error) (first failure only, e.g. to cancel the running steps) are called from the
+            calling thread. Raises the first step error, or StartupStopped if should_stop() returned True
+            before everything ran.
+        """
+        results = {}
+        waiting = dict(self.steps)
+        running = {} # future -> step
+        error = None
+        stopped = False
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="startup") as pool:
+            while True:
+                if error is None and not stopped:
+                    if should_stop and should_stop():
+                        stopped = True
+                    else:
+                        for name, step in list(waiting.items()):
+                            if all(need in results for need in step.needs):
+                                del waiting[name]
+                                if on_start:
+                                    on_start(step)
+                                running[pool.submit(self._timed, step, results)] = step
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    try:
+                        results[step.name], elapsed = future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                            if on_error:
+                                on_error(step, e)
+                        continue
+                    if on_finish:
+                        on_finish(step, elapsed)
+
+        if error is not None:
+            raise error
+        if waiting:
+            raise StartupStopped()
+        return results
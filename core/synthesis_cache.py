@@ -0,0 +1,153 @@
+# synthesis_cache.py
+"""
+    Persistent, content-addressed cache of synthesized chunks.
+
+    A chunk is keyed on everything that changes its audio: the phonemes (or the text, when the engine
+    phonemizes it), the voice name or blend vector, the speed and a hash of the model file.
+    Entries are stored as .npy files and evicted least-recently-used first once the cache grows
+    past its size limit.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import builtins
+
+from core.paths import get_cache_dir
+
+INDEX_FILE = "index.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_cache = None
+
+
+def model_fingerprint(model_path, known_hashes):
+    """SHA-256 of the model file, reused from known_hashes while the file's size and mtime don't change."""
+    stat = os.stat(model_path)
+    stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+    known = known_hashes.get(model_path)
+    if known and known.get("stamp") == stamp:
+        return known["sha256"]
+
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    known_hashes[model_path] = {"stamp": stamp, "sha256": digest.hexdigest()}
+    return known_hashes[model_path]["sha256"]
+
+
+class SynthesisCache:
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, INDEX_FILE)
+        self._entries = {}
+        self._model_hashes = {}
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = data.get("entries", {})
+            self._model_hashes = data.get("model_hashes", {})
+        except (OSError, ValueError):
+            self._entries = {}
+            self._model_hashes = {}
+
+    def save_index(self):
+        with self._lock:
+            data = {"entries": self._entries, "model_hashes": self._model_hashes}
+            tmp_path = self._index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._index_path)
+
+    def model_id(self, model_path):
+        with self._lock:
+            return model_fingerprint(model_path, self._model_hashes)
+
+    @staticmethod
+    def make_key(model_id, language_code, phonemes, is_phonemes, voice, speed):
+        digest = hashlib.sha256()
+        digest.update(f"{model_id}|{language_code}|{int(is_phonemes)}|{float(speed):.3f}|".encode('utf-8'))
+        if isinstance(voice, str):
+            digest.update(f"voice:{voice}|".encode('utf-8'))
+        else:
+            # Blended voice: the style vector itself is the identity
+            voice = builtins.np.ascontiguousarray(voice)
+            digest.update(f"style:{voice.dtype}:{voice.shape}|".encode('utf-8'))
+            digest.update(voice.tobytes())
+        digest.update(phonemes.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key, count_miss=True):
+        """Returns (samples, sample_rate) on a hit, None on a miss. count_miss=False for lookups that are retried under another key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += count_miss
+                return None
+            try:
+                samples = builtins.np.load(self._entry_path(key))
+            except (OSError, ValueError):
+                # File went missing or is damaged, forget about it
+                self._entries.pop(key, None)
+                self.misses += count_miss
+                return None
+            entry["last_used"] = time.time()
+            self.hits += 1
+            return samples, entry["sample_rate"]
+
+    def put(self, key, samples, sample_rate):
+        with self._lock:
+            path = self._entry_path(key)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                builtins.np.save(f, samples)
+            os.replace(tmp_path, path)
+            self._entries[key] = {"size": os.path.getsize(path), "sample_rate": sample_rate, "last_used": time.time()}
+            self._evict()
+
+    def _evict(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self._entries[key]
+
+    def total_bytes(self):
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+
+def get_synthesis_cache(max_mb):
+    """Returns the shared cache, resizing it if the limit changed in the settings."""
+    global _cache
+    if _cache is None:
+        _cache = SynthesisCache(get_cache_dir('synthesis'), max_mb * 1024 * 1024)
+    elif _cache.max_bytes != max_mb * 1024 * 1024:
+        with _cache._lock:
+            _cache.max_bytes = max_mb * 1024 * 1024
+            _cache._evict()
+    return _cache
@@ -0,0 +1,204 @@
+# text_chunker.py
+"""
+    Splitting text into render chunks. No Qt in here, the headless renderer uses it too.
+
+    split_text_into_chunks cuts on a character count, which is only a rough guess of how many
+    phoneme tokens a chunk turns into. split_text_by_tokens phonemizes each sentence and packs
+    sentences until the next one would push the chunk past the model's token limit.
+
+    Both cut at sentence ends first, then at clause boundaries, then between words. Japanese and
+    Chinese end sentences with 。！？ and clauses with 、，；： without any space after them, and
+    have no spaces between words either, so a piece that still doesn't fit is cut at a hard
+    character (or token) limit as a last resort.
+
+    With fast_start, the first chunk is cut at the first clause boundary past a small size and
+    each chunk after it needs FAST_START_GROWTH times more, until the normal maximum is reached.
+    A short first chunk is synthesized quickly, so playback starts sooner, and every later chunk
+    is ready before the one before it has finished playing.
+"""
+import re
+
+MAX_PHONEME_TOKENS = 510 # kokoro's context length, one token per phoneme
+TOKEN_BUDGET = MAX_PHONEME_TOKENS - 10 # a little room for the tokens joining sentences may add
+FAST_START_CHARS = 40 # size the first chunk has to reach before it's cut, with fast_start
+FAST_START_TOKENS = 40
+FAST_START_GROWTH = 2
+
+# After . ! ? followed by whitespace, or after 。！？ (and the closing bracket/quote that may follow it)
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])(?![。！？」』）”’])\s*|(?<=[。！？][」』）”’])\s*')
+CLAUSE_BREAK = re.compile(r'(?<=[,;:])\s+|(?<=[、，；：])\s*')
+ANY_BREAK = re.compile(f"{SENTENCE_BREAK.pattern}|{CLAUSE_BREAK.pattern}")
+CJK_CHARS = re.compile(r'[\u3000-\u30FF\u3400-\u4DBF\u4E00-\u9FFF\uF900-\uFAFF\uFF00-\uFFEF]')
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_BREAK.split(text) if sentence.strip()]
+
+
+def split_clauses(sentence):
+    """Cuts at commas and the like, each clause keeps its punctuation."""
+    return [clause for clause in CLAUSE_BREAK.split(sentence) if clause.strip()]
+
+
+def split_words(clause, max_length):
+    """Cuts at spaces; words (or unspaced CJK runs) longer than max_length are cut every max_length characters."""
+    words = []
+    for word in clause.split():
+        words.extend(word[start:start + max_length] for start in range(0, len(word), max_length))
+    return words
+
+
+def join_text(left, right):
+    """No space between pieces of Japanese or Chinese text."""
+    if not left:
+        return right
+    if CJK_CHARS.match(left[-1]) or CJK_CHARS.match(right[0]):
+        return left + right
+    return left + ' ' + right
+
+
+def split_fast_start(text, measure, first_size, max_size, growth=FAST_START_GROWTH):
+    """
+        Cuts the head of text into chunks that grow from first_size towards max_size, each one ending
+        at the first sentence or clause boundary past its size. measure(piece) -> (phonemes or None, size).
+        Returns ([(chunk text, [phonemes of its pieces])], rest of the text); the rest is left to the
+        normal split, as soon as the size reaches max_size or a stretch without boundaries won't fit.
+    """
+    chunks = []
+    target = first_size
+    chunk_start, used, phonemes_list = 0, 0, []
+    piece_start = 0
+    boundaries = [(match.start(), match.end()) for match in ANY_BREAK.finditer(text)] + [(len(text), len(text))]
+
+    for piece_end, next_start in boundaries:
+        if target >= max_size:
+            break
+        piece = text[piece_start:piece_end]
+        if not piece.strip():
+            piece_start = next_start
+            continue
+        phonemes, size = measure(piece.strip())
+        # +1 for the space that joins it to the previous piece
+        if used + (1 if used else 0) + size > max_size:
+            break
+        used += size + (1 if used else 0)
+        phonemes_list.append(phonemes)
+        piece_start = next_start
+        if used >= target or piece_start >= len(text):
+            chunks.append((text[chunk_start:piece_end].strip(), phonemes_list))
+            chunk_start, used, phonemes_list = piece_start, 0, []
+            target *= growth
+
+    return chunks, text[chunk_start:]
+
+
+def split_text_into_chunks(text, max_length=481, fast_start=0):
+    chunks = []
+    if fast_start:
+        head, text = split_fast_start(text, lambda piece: (None, len(piece)), fast_start, max_length)
+        chunks = [chunk for chunk, _ in head]
+
+    # Split the text into sentences
+    sentences = split_sentences(text)
+    current_chunk = ""
+
+    for sentence in sentences:
+        # If adding the sentence to the current chunk exceeds the max length
+        if len(current_chunk) + len(sentence) + 1 > max_length:
+            # If the sentence itself is longer than the max length
+            if len(sentence) > max_length:
+                # Split the sentence by commas
+                parts = split_clauses(sentence)
+                for part in parts:
+                    if len(current_chunk) + len(part) + 1 > max_length:
+                        # If the part itself is longer than the max length, split by words
+                        words = split_words(part, max_length)
+                        for word in words:
+                            if len(current_chunk) + len(word) + 1 > max_length:
+                                if current_chunk:
+                                    chunks.append(current_chunk.strip())
+                                current_chunk = word
+                            else:
+                                current_chunk = join_text(current_chunk, word)
+                    else:
+                        current_chunk = join_text(current_chunk, part)
+            else:
+                if current_chunk:
+                    chunks.append(current_chunk.strip())
+                current_chunk = sentence
+        else:
+            current_chunk = join_text(current_chunk, sentence)
+
+    # Add the last chunk if there's any remaining text
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+
+def _split_over_budget(piece, measure, max_tokens, tokens):
+    """Cuts a piece that is over the budget at clauses, then words, then characters. Yields (text, phonemes, tokens)."""
+    parts = split_clauses(piece)
+    if len(parts) < 2:
+        parts = piece.split()
+    if len(parts) < 2:
+        # Nowhere left to cut but between characters: aim for pieces that just fit
+        size = max(1, len(piece) * max_tokens // max(tokens, 1))
+        if size >= len(piece):
+            size = max(1, len(piece) // 2)
+        parts = [piece[start:start + size] for start in range(0, len(piece), size)]
+        if len(parts) < 2:
+            phonemes, tokens = measure(piece)
+            yield piece, phonemes, tokens
+            return
+
+    for part in parts:
+        phonemes, part_tokens = measure(part)
+        if part_tokens > max_tokens:
+            yield from _split_over_budget(part, measure, max_tokens, part_tokens)
+        else:
+            yield part, phonemes, part_tokens
+
+
+def iter_text_by_tokens(text, phonemize, count_tokens=len, max_tokens=TOKEN_BUDGET, fast_start=0):
+    """
+        Packs sentences into chunks of at most max_tokens phoneme tokens.
+
+        phonemize(text) -> phonemes and count_tokens(phonemes) -> int are the engine's own G2P and tokenizer.
+        Yields (chunk text, chunk phonemes) as soon as each chunk is full, so the G2P of the rest of the
+        text can overlap with the render of the first chunks. The phonemes are the sentences' phonemes
+        joined with spaces, so the render doesn't have to run G2P on the chunk again.
+        fast_start is the first chunk's size in tokens, see split_fast_start.
+    """
+    def measure(piece):
+        phonemes = phonemize(piece)
+        return phonemes, count_tokens(phonemes)
+
+    if fast_start:
+        head, text = split_fast_start(text, measure, fast_start, max_tokens)
+        for chunk, phonemes_list in head:
+            yield chunk, ' '.join(phonemes_list)
+    chunk_text, phonemes_list, used = "", [], 0
+
+    for sentence in split_sentences(text):
+        phonemes, tokens = measure(sentence)
+        if tokens <= max_tokens:
+            pieces = [(sentence, phonemes, tokens)]
+        else:
+            pieces = _split_over_budget(sentence, measure, max_tokens, tokens)
+        for piece, piece_phonemes, piece_tokens in pieces:
+            # +1 for the space that joins it to the previous piece
+            if chunk_text and used + 1 + piece_tokens > max_tokens:
+                yield chunk_text.strip(), ' '.join(phonemes_list)
+                chunk_text, phonemes_list, used = "", [], 0
+            chunk_text = join_text(chunk_text, piece)
+            phonemes_list.append(piece_phonemes)
+            used += piece_tokens + (1 if used else 0)
+
+    if chunk_text:
+        yield chunk_text.strip(), ' '.join(phonemes_list)
+
+
+def split_text_by_tokens(text, phonemize, count_tokens=len, max_tokens=TOKEN_BUDGET, fast_start=0):
+    """iter_text_by_tokens as a list of (chunk text, chunk phonemes)."""
+    return list(iter_text_by_tokens(text, phonemize, count_tokens, max_tokens, fast_start))
@@ -4,6 +4,8 @@ from PyQt6.QtWidgets import QSlider, QWidget, QDockWidget, QLabel  #, QMainWindo
 
 import re
 
+from core.text_chunker import split_text_into_chunks # Kept here for the modules that import it from utils
+
 main_window = None
 
 
@@ -32,9 +34,36 @@ class SettingsManager:
             "TTS/BlendingBalance": 50,
             "TTS/Speed": "1",
             "TTS/OutputFile": None,
+            "TTS/ParallelRender": False,
+            "TTS/RenderWorkers": 0,
+            "TTS/InMemoryChunks": False,
+            "TTS/IncrementalRender": True,
+            "TTS/BatchInference": False,
+            "TTS/RenderMetricsLog": False,
+            "TTS/FastStart": True,
+            "TTS/ModelVariants": "{}", # language -> fp32/fp16/int8, as JSON
+
+            "ONNX/IntraOpThreads": 0,
+            "ONNX/InterOpThreads": 0,
+            "ONNX/ExecutionMode": "sequential",
+            "ONNX/GraphOptimization": "all",
+            "ONNX/CacheOptimizedModel": True,
+
+            "OUTPUT/BitrateMode": "variable", # Opus/MP3: variable, constant or average
+            "OUTPUT/Bitrate": 96, # kbps, constant and average modes
+            "OUTPUT/Quality": 7, # 0-10, variable mode
+            "OUTPUT/FlacCompression": 5, # 0-8
+
+            "MODELS/VerifyOnline": False, # compare the model files with the download server on every start
+
+            "CACHE/SynthesisCache": True,
+            "CACHE/SynthesisCacheMB": 512,
+            "CACHE/G2PCache": True,
+            "CACHE/G2PCachePersistent": False,
 
             "PLAYER/AutoPlay": True,
             "PLAYER/Volume": 70,
+            "PLAYER/StreamingPlayback": True,
         }
 
         self.initialize_default_settings()
@@ -270,41 +299,3 @@ def format_size(size_bytes):
         if size_bytes < 1024:
             return f"{size_bytes:.1f} {unit}"
         size_bytes /= 1024
-
-
-def split_text_into_chunks(text, max_length=481):
-    # Split the text into sentences
-    sentences = re.split(r'(?<=[.!?]) +', text)
-    chunks = []
-    current_chunk = ""
-
-    for sentence in sentences:
-        # If adding the sentence to the current chunk exceeds the max length
-        if len(current_chunk) + len(sentence) + 1 > max_length:
-            # If the sentence itself is longer than the max length
-            if len(sentence) > max_length:
-                # Split the sentence by commas
-                parts = sentence.split(',')
-                for part in parts:
-                    if len(current_chunk) + len(part) + 1 > max_length:
-                        # If the part itself is longer than the max length, split by words
-                        words = part.split()
-                        for word in words:
-                            if len(current_chunk) + len(word) + 1 > max_length:
-                                chunks.append(current_chunk.strip())
-                                current_chunk = word
-                            else:
-                                current_chunk += ' ' + word if current_chunk else word
-                    else:
-                        current_chunk += ',' + part if current_chunk else part
-            else:
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        else:
-            current_chunk += ' ' + sentence if current_chunk else sentence
-
-    # Add the last chunk if there's any remaining text
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-
-    return chunks
\ No newline at end of file
@@ -0,0 +1,75 @@
+# voice_styles.py
+"""
+    Voice style vectors for rendering, with blends computed once and reused.
+
+    A blend only depends on (voice A, voice B, balance), so there's no reason to redo the
+    arithmetic for every chunk or every render. A small table of blends (every TABLE_STEP percent)
+    can be precomputed for a voice pair as soon as it is picked in the TTS settings.
+"""
+import threading
+from collections import OrderedDict
+
+import builtins
+
+TABLE_STEP = 10
+MAX_BLENDS = 64 # a style is about half a MB, this keeps the table small
+
+_provider = None
+
+
+class VoiceStyleProvider:
+    def __init__(self, kokoro, voices_path=None):
+        self.kokoro = kokoro
+        self.voices_path = voices_path
+        self._styles = {}
+        self._blends = OrderedDict()
+        self._lock = threading.Lock()
+
+    def style(self, voice):
+        with self._lock:
+            if voice not in self._styles:
+                self._styles[voice] = self.kokoro.get_voice_style(voice)
+            return self._styles[voice]
+
+    def blend(self, voice_a, voice_b, balance):
+        """Style of voice_a mixed with `balance` percent of voice_b."""
+        balance = float(balance)
+        key = (voice_a, voice_b, balance)
+        with self._lock:
+            if key in self._blends:
+                self._blends.move_to_end(key)
+                return self._blends[key]
+
+        primary_voice = self.style(voice_a)
+        secondary_voice = self.style(voice_b)
+        blended = builtins.np.add(primary_voice * ((100 - balance) / 100), secondary_voice * (balance / 100))
+
+        with self._lock:
+            self._blends[key] = blended
+            while len(self._blends) > MAX_BLENDS:
+                self._blends.popitem(last=False)
+        return blended
+
+    def voice_for(self, voice, blend_voice=None, blend_balance=None):
+        """What to pass to kokoro.create: the voice name, or the blended style when blending."""
+        if blend_voice and blend_balance is not None:
+            return self.blend(voice, blend_voice, blend_balance)
+        return voice
+
+    def precompute_table(self, voice_a, voice_b, step=TABLE_STEP):
+        for balance in range(0, 101, step):
+            self.blend(voice_a, voice_b, balance)
+
+
+def get_voice_style_provider(kokoro, voices_path=None):
+    """
+        Returns the shared provider for the voices file. The fp32/fp16/int8 engines all load the same
+        file, so switching models keeps the styles and blends; kokoro is only used to read them.
+    """
+    global _provider
+    voices_path = voices_path or getattr(builtins, 'kokoro_voices_path', None)
+    if _provider is None or _provider.voices_path != voices_path:
+        _provider = VoiceStyleProvider(kokoro, voices_path)
+    else:
+        _provider.kokoro = kokoro
+    return _provider
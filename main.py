@@ -70,23 +70,28 @@ Next:
 
 
 
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtWidgets import QApplication
 import sys
 import os
-from core.utils import SettingsManager
-from ui.usei import MainWindow
-from ui.splash_window import SplashWindow
+import multiprocessing
 
-settings_manager = SettingsManager()
+# The parallel render workers are spawned and import this file again as __mp_main__,
+# so the UI is only imported (and Qt only set up) from main()
 
-scale = settings_manager.get("SETTINGS/UIScale")
 
-if scale:
-    os.environ["QT_SCALE_FACTOR"] = str(scale)
+def main():
+    from PyQt6.QtWidgets import QApplication
+    from core.utils import SettingsManager
+    from core.render_pool import shutdown_worker_pool
+    from ui.usei import MainWindow
+    from ui.splash_window import SplashWindow
 
+    settings_manager = SettingsManager()
+
+    scale = settings_manager.get("SETTINGS/UIScale")
+
+    if scale:
+        os.environ["QT_SCALE_FACTOR"] = str(scale)
 
-def main():
     app = QApplication(sys.argv)
     w, h = 800, 600
     main_win = MainWindow(w, h)
@@ -107,10 +112,13 @@ def main():
         if splash_window.module_loader_thread.isRunning():
             splash_window.module_loader_thread.quit()
             splash_window.module_loader_thread.wait(1000)
-    
+
+    shutdown_worker_pool()
+
     sys.exit(exit_code)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Needed by the parallel render workers in the frozen build
     main()
 
 
@@ -0,0 +1,157 @@
+# test_downloader.py
+"""
+    core.downloader against a local http.server that answers (or ignores) range requests.
+
+        python -m unittest tests.test_downloader
+"""
+import os
+import re
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from core import downloader
+
+RANGE_SIZE = 256 * 1024 # MIN_RANGE_SIZE for the tests, so a small file still gets split
+DATA = os.urandom(4 * RANGE_SIZE + 123)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves DATA, with the server's `options` deciding how it answers."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        options = self.server.options
+        range_header = self.headers.get('Range', '')
+        match = re.match(r'bytes=(\d+)-(\d*)$', range_header)
+        probing = range_header == 'bytes=0-0'
+        with self.server.lock:
+            self.server.requests.append(range_header)
+
+        if match and (options["ranges"] or (probing and options["ranges_on_probe"])):
+            start = int(match[1])
+            end = int(match[2]) if match[2] else len(DATA) - 1
+            body = DATA[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+        else:
+            body = DATA
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        cut = None
+        if not probing:
+            with self.server.lock:
+                if self.server.cuts_left > 0:
+                    self.server.cuts_left -= 1
+                    cut = len(body) // 3
+        length = len(body) if cut is None else cut
+        try:
+            for offset in range(0, length, downloader.BLOCK_SIZE):
+                block = body[offset:min(offset + downloader.BLOCK_SIZE, length)]
+                self.wfile.write(block)
+                with self.server.lock:
+                    self.server.bytes_sent += len(block)
+                if options["delay"]:
+                    time.sleep(options["delay"])
+        except OSError:
+            return
+        if cut is not None:
+            self.close_connection = True # drop the connection halfway through the body
+
+
+class DownloaderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+        self.server.daemon_threads = True
+        self.server.options = {"ranges": True, "ranges_on_probe": False, "delay": 0.0}
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.bytes_sent = 0
+        self.server.cuts_left = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.folder = tempfile.mkdtemp(prefix="usei_download_test_")
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/kokoro-v1.0.onnx'
+        self.destination = os.path.join(self.folder, 'kokoro-v1.0.onnx')
+
+        patcher = mock.patch.object(downloader, 'MIN_RANGE_SIZE', RANGE_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def download(self, **kwargs):
+        kwargs.setdefault("backoff_factor", 0.01)
+        return downloader.download_file(self.url, self.destination, **kwargs)
+
+    def assertDownloaded(self):
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        self.assertEqual(os.listdir(self.folder), ['kokoro-v1.0.onnx'])
+
+    def range_starts(self):
+        return sorted(int(re.match(r'bytes=(\d+)-', header)[1]) for header in self.server.requests if header and header != 'bytes=0-0')
+
+    def test_parallel_ranges(self):
+        self.assertTrue(self.download(workers=4))
+        self.assertDownloaded()
+        ranges = downloader.split_ranges(len(DATA), 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(self.range_starts(), [start for start, end, done in ranges])
+
+    def test_resume_after_dropped_connection(self):
+        self.server.cuts_left = 1
+        messages = []
+        self.assertTrue(self.download(workers=1, on_message=messages.append))
+        self.assertDownloaded()
+        # The retry asks for the rest of the range, not the whole file again
+        first, retry = self.range_starts()
+        self.assertEqual(first, 0)
+        self.assertTrue(0 < retry <= len(DATA) // 3)
+        self.assertLess(self.server.bytes_sent, len(DATA) + len(DATA) // 3)
+        self.assertTrue(any(message.startswith('Retrying') for message in messages))
+
+    def test_resume_after_stop(self):
+        self.server.options["delay"] = 0.05
+        progress = []
+        self.assertFalse(self.download(workers=2, on_progress=progress.append, should_stop=lambda: bool(progress) and progress[-1] >= 10))
+        self.assertTrue(os.path.exists(self.destination + downloader.PART_SUFFIX))
+        self.assertTrue(os.path.exists(self.destination + downloader.STATE_SUFFIX))
+        self.assertFalse(os.path.exists(self.destination))
+
+        sent_before = self.server.bytes_sent
+        self.server.options["delay"] = 0.0
+        messages = []
+        self.assertTrue(self.download(workers=2, on_message=messages.append))
+        self.assertDownloaded()
+        self.assertTrue(any(message.startswith('Resuming') for message in messages))
+        # Only what the first attempt hadn't written yet came over again
+        self.assertLess(self.server.bytes_sent - sent_before, len(DATA))
+
+    def test_single_stream_without_ranges(self):
+        self.server.options["ranges"] = False
+        self.assertTrue(self.download(workers=4))
+        self.assertDownloaded()
+        self.assertEqual(self.range_starts(), [])
+
+    def test_single_stream_when_a_range_is_ignored(self):
+        # Answers the probe with 206 but sends the whole file for the real range requests
+        self.server.options["ranges"] = False
+        self.server.options["ranges_on_probe"] = True
+        messages = []
+        self.assertTrue(self.download(workers=4, on_message=messages.append))
+        self.assertDownloaded()
+        self.assertTrue(any('ignored a range request' in message for message in messages))
+
+
+if __name__ == "__main__":
+    unittest.main()
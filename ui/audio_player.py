@@ -1,5 +1,5 @@
 # audio_player.py
-from PyQt6.QtCore import Qt, QUrl
+from PyQt6.QtCore import Qt, QUrl, QBuffer, QByteArray, QIODevice, QTimer
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QLabel, QCheckBox, QToolButton
 from PyQt6.QtGui import QIcon
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
@@ -8,6 +8,7 @@ import os
 import sys
 from core.utils import SettingsManager, CustomSlider
 from core.signals import global_signals
+from ui.stream_player import StreamingPlayback, pcm_to_wav
 import shutil
 
 settings_manager = SettingsManager()
@@ -29,13 +30,30 @@ class AudioPlayerWidget(QWidget):
         self.player = QMediaPlayer()
         self.audio_output = QAudioOutput()
         self.player.setAudioOutput(self.audio_output)
+        self.chunk_buffer = None # Keeps the in-memory chunk alive while the player reads from it
+
+        # Gapless playback of the render while it runs, the fused file takes over once it's done
+        self.stream = StreamingPlayback(self)
+        self.stream.playing_changed.connect(self.set_play_icon)
+        self.stream.finished.connect(self.on_stream_finished)
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setInterval(100)
+        self.stream_timer.timeout.connect(self.update_stream_position)
+        self.streaming = False
+        self.stream_closed = False # stopped by the user or cut short, the rest of this render isn't streamed
+        self.stream_fallback = False # the device can't stream, chunks go through the playlist instead
+        self.stream_resume_ms = None # the stream was cut short, the fused file takes over from here
+        self.resume_playing = False
 
         self.init_ui()
         self.init_media()
+        self.sync_stream_volume()
 
         self.reset_player_state()
         
         global_signals.addChunkToPlayerSignal.connect(self.add_to_playlist)
+        global_signals.addChunkAudioToPlayerSignal.connect(self.add_audio_to_playlist)
+        global_signals.addChunkPcmToPlayerSignal.connect(self.add_pcm_to_stream)
         global_signals.fused_file_completed.connect(self.handle_fused_file_update)
         global_signals.new_render_started.connect(self.reset_player_state)
 
@@ -113,11 +131,17 @@ class AudioPlayerWidget(QWidget):
         self.setLayout(main_layout)
 
     def reset_player_state(self):
+        self.stop_stream()
+        self.stream_closed = False
+        self.stream_fallback = False
+        self.stream_resume_ms = None
+        self.resume_playing = False
         if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
             self.stop_playback()
         else:
             self.playlist_files = []
             self.player.setSource(QUrl())
+            self.chunk_buffer = None
             self.current_index = 0
             self.fused_file_path = ""
             self.fused_file_finished = False
@@ -155,13 +179,99 @@ class AudioPlayerWidget(QWidget):
             self.current_index = 0
             self.load_current_file()
 
+    def add_audio_to_playlist(self, wav_bytes):
+        # Chunks rendered in memory arrive as WAV bytes instead of file paths
+        self.playlist_files.append(QByteArray(wav_bytes))
+        global_signals.output_signal.emit(f"Added in-memory chunk #{len(self.playlist_files) - 1} to playlist")
+
+        if len(self.playlist_files) == 1:
+            self.current_index = 0
+            self.load_current_file()
+
+    def add_pcm_to_stream(self, pcm, sample_rate):
+        if self.stream_fallback:
+            self.add_audio_to_playlist(pcm_to_wav(pcm, sample_rate))
+            return
+        if self.stream_closed:
+            return
+
+        first_chunk = not self.streaming
+        if first_chunk:
+            if not self.stream.start(sample_rate):
+                global_signals.output_signal.emit("The audio device can't stream 16-bit PCM, playing the chunks one at a time instead.")
+                self.stream_fallback = True
+                self.add_audio_to_playlist(pcm_to_wav(pcm, sample_rate))
+                return
+            self.streaming = True
+            self.seek_bar.setEnabled(False) # nothing to seek in until the fused file is loaded
+            self.stream_timer.start()
+        elif not self.stream.has_room(len(pcm)):
+            # Paused, or the render is far ahead: keep what's buffered and continue from the fused file
+            global_signals.output_signal.emit("Too much unplayed audio, the rest plays from the output file once the render is done.")
+            self.stream_closed = True
+            self.stream_resume_ms = self.stream.duration_ms()
+            self.stream.end_of_stream()
+            return
+
+        self.stream.feed(pcm)
+        if first_chunk and self.autoplay_checkbox.isChecked():
+            self.stream.play()
+
+    def stop_stream(self):
+        if self.stream.active:
+            self.stream.stop()
+            self.set_play_icon(False)
+        self.stream_timer.stop()
+        self.streaming = False
+        self.seek_bar.setEnabled(True)
+
+    def on_stream_finished(self):
+        self.update_stream_position()
+        self.stop_stream()
+        if self.stream_resume_ms is not None:
+            self.resume_playing = True
+            if self.fused_file_finished:
+                self.resume_from_fused_file()
+            return
+        self.on_playlist_finished()
+
+    def resume_from_fused_file(self):
+        """Plays the fused file from where the cut-short stream ended."""
+        position, self.stream_resume_ms = self.stream_resume_ms, None
+        self.on_playlist_finished()
+        if self.fused_file_loaded:
+            self.player.setPosition(position)
+            if self.resume_playing:
+                self.player.play()
+        self.resume_playing = False
+
+    def update_stream_position(self):
+        duration = self.stream.duration_ms()
+        position = min(self.stream.position_ms(), duration)
+        self.seek_bar.setRange(0, duration)
+        self.seek_bar.setValue(position)
+        self.current_time_label.setText(self.format_time(position))
+        self.total_time_label.setText(self.format_time(duration))
+
     def load_current_file(self):
-        if self.current_index < len(self.playlist_files) and os.path.exists(self.playlist_files[self.current_index]):
-            current_file = self.playlist_files[self.current_index]
+        if self.current_index >= len(self.playlist_files):
+            return
+        current_file = self.playlist_files[self.current_index]
+
+        if isinstance(current_file, QByteArray):
+            self.chunk_buffer = QBuffer()
+            self.chunk_buffer.setData(current_file)
+            self.chunk_buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+            self.player.setSourceDevice(self.chunk_buffer, QUrl(f"chunk_{self.current_index:03d}.wav"))
+            global_signals.output_signal.emit(f"Loading in-memory chunk #{self.current_index}")
+        elif os.path.exists(current_file):
             self.player.setSource(QUrl.fromLocalFile(current_file))
             global_signals.output_signal.emit(f"Loading file #{self.current_index}: {current_file}")
-            if self.autoplay_checkbox.isChecked():
-                self.player.play()
+        else:
+            return
+
+        if self.autoplay_checkbox.isChecked():
+            self.player.play()
 
 
     def handle_fused_file_update(self, success, message, temp_folder):
@@ -173,6 +283,11 @@ class AudioPlayerWidget(QWidget):
         else:
             global_signals.output_signal.emit(f"Fusion failed: {message}")
 
+        if self.streaming:
+            self.stream.end_of_stream()
+        elif self.stream_resume_ms is not None and self.resume_playing:
+            self.resume_from_fused_file()
+
     def init_media(self):
         self.player.positionChanged.connect(self.update_position)
         self.player.durationChanged.connect(self.update_duration)
@@ -221,20 +336,34 @@ class AudioPlayerWidget(QWidget):
         self.current_time_label.setText(self.format_time(position))
 
     def toggle_play_pause(self):
+        if self.streaming:
+            if self.stream.is_playing():
+                self.stream.pause()
+            else:
+                self.stream.play()
+            return
         if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
             self.player.pause()
         else:
             self.player.play()
 
     def stop_playback(self):
+        if self.streaming:
+            self.stop_stream()
+            self.stream_closed = True
+        self.stream_resume_ms = None
+        self.resume_playing = False
         self.player.stop()
         # If fused file is ready and not loaded yet, load it and clean up.
         if self.fused_file_finished and self.fused_file_path and os.path.exists(self.fused_file_path) and not self.fused_file_loaded:
             self.on_playlist_finished()
 
     def on_playback_state_changed(self, state):
+        self.set_play_icon(state == QMediaPlayer.PlaybackState.PlayingState)
+
+    def set_play_icon(self, playing):
         theme = settings_manager.get('SETTINGS/Theme').lower()
-        icon = 'pause.ico' if state == QMediaPlayer.PlaybackState.PlayingState else 'play.ico'
+        icon = 'pause.ico' if playing else 'play.ico'
         self.play_button.setIcon(QIcon(os.path.join(self.res_folder, theme, icon)))
 
     def set_position(self, position):
@@ -255,7 +384,12 @@ class AudioPlayerWidget(QWidget):
         else:
             self.audio_output.setMuted(True)
             self.mute_button.setIcon(QIcon(os.path.join(self.res_folder, theme, 'mute.ico')))
+        self.sync_stream_volume()
 
     def update_volume(self, value):
         self.audio_output.setVolume(value / 100)
+        self.sync_stream_volume()
+
+    def sync_stream_volume(self):
+        self.stream.set_volume(0.0 if self.audio_output.isMuted() else self.audio_output.volume())
 
@@ -8,6 +8,8 @@ import os
 from core.utils import SettingsManager
 from core.theme import apply_theme, get_os_theme
 from core.signals import global_signals
+from core.onnx_session import EXECUTION_MODES, GRAPH_OPTIMIZATION_LEVELS
+from core.audio_io import BITRATE_MODES, BITRATE_SETTING_RANGE, QUALITY_RANGE
 
 settings_manager = SettingsManager()
 
@@ -170,6 +172,158 @@ class CustomDialog(QDialog):
         self.confirmTextModified_check = QCheckBox("Ask to save text on exit if it has been modified")
         program_layout.addWidget(self.confirmTextModified_check)
 
+#### Render ####
+
+        render_settings_label = QLabel("Render settings:")
+        program_layout.addWidget(render_settings_label)
+
+        self.parallel_render_check = QCheckBox("Render chunks in parallel (one TTS engine per worker process)")
+        program_layout.addWidget(self.parallel_render_check)
+
+        workers_row_layout = QHBoxLayout()
+        workers_label = QLabel("Workers:")
+        workers_label.setFixedWidth(60)
+        workers_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setMinimumWidth(50)
+        self.workers_spinbox.setMinimum(0)
+        self.workers_spinbox.setMaximum(max(os.cpu_count() or 1, 1) * 2)
+        workers_auto_label = QLabel(f"(0 = one per CPU core, {os.cpu_count() or 1} on this machine)")
+
+        workers_row_layout.addWidget(workers_label)
+        workers_row_layout.addWidget(self.workers_spinbox)
+        workers_row_layout.addWidget(workers_auto_label)
+        workers_row_layout.addStretch(1)
+        program_layout.addLayout(workers_row_layout)
+
+        self.streaming_playback_check = QCheckBox("Stream chunks straight to the audio device while rendering when autoplay is on (gapless)")
+        program_layout.addWidget(self.streaming_playback_check)
+
+        self.fast_start_check = QCheckBox("Fast start: begin with a short chunk and grow from there when autoplay is on")
+        program_layout.addWidget(self.fast_start_check)
+
+        self.in_memory_check = QCheckBox("Keep rendered chunks in memory instead of temporary files")
+        program_layout.addWidget(self.in_memory_check)
+
+        self.incremental_render_check = QCheckBox("Only re-render the chunks that changed since the last render")
+        program_layout.addWidget(self.incremental_render_check)
+
+        self.batch_inference_check = QCheckBox("Batch chunks of similar length into one inference run (single engine only)")
+        program_layout.addWidget(self.batch_inference_check)
+
+        self.metrics_log_check = QCheckBox("Log per-chunk render timings to render_metrics.jsonl")
+        program_layout.addWidget(self.metrics_log_check)
+
+        cache_row_layout = QHBoxLayout()
+        self.synthesis_cache_check = QCheckBox("Cache rendered chunks on disk, up to")
+        self.cache_size_spinbox = QSpinBox()
+        self.cache_size_spinbox.setMinimumWidth(60)
+        self.cache_size_spinbox.setRange(16, 65536)
+        self.cache_size_spinbox.setSingleStep(64)
+        self.cache_size_spinbox.setSuffix(" MB")
+        self.synthesis_cache_check.toggled.connect(self.cache_size_spinbox.setEnabled)
+
+        cache_row_layout.addWidget(self.synthesis_cache_check)
+        cache_row_layout.addWidget(self.cache_size_spinbox)
+        cache_row_layout.addStretch(1)
+        program_layout.addLayout(cache_row_layout)
+
+        g2p_cache_row_layout = QHBoxLayout()
+        self.g2p_cache_check = QCheckBox("Reuse phonemes of unchanged sentences")
+        self.g2p_cache_persistent_check = QCheckBox("Keep them between sessions")
+        self.g2p_cache_check.toggled.connect(self.g2p_cache_persistent_check.setEnabled)
+
+        g2p_cache_row_layout.addWidget(self.g2p_cache_check)
+        g2p_cache_row_layout.addWidget(self.g2p_cache_persistent_check)
+        g2p_cache_row_layout.addStretch(1)
+        program_layout.addLayout(g2p_cache_row_layout)
+
+#### Inference engine ####
+
+        onnx_settings_label = QLabel("Inference engine settings (applied on the next start):")
+        program_layout.addWidget(onnx_settings_label)
+
+        threads_row_layout = QHBoxLayout()
+        intra_threads_label = QLabel("Threads per operation:")
+        self.intra_threads_spinbox = QSpinBox()
+        self.intra_threads_spinbox.setMinimumWidth(50)
+        self.intra_threads_spinbox.setRange(0, max(os.cpu_count() or 1, 1) * 2)
+        inter_threads_label = QLabel("Parallel operations:")
+        self.inter_threads_spinbox = QSpinBox()
+        self.inter_threads_spinbox.setMinimumWidth(50)
+        self.inter_threads_spinbox.setRange(0, max(os.cpu_count() or 1, 1) * 2)
+        threads_auto_label = QLabel("(0 = automatic)")
+
+        threads_row_layout.addWidget(intra_threads_label)
+        threads_row_layout.addWidget(self.intra_threads_spinbox)
+        threads_row_layout.addWidget(inter_threads_label)
+        threads_row_layout.addWidget(self.inter_threads_spinbox)
+        threads_row_layout.addWidget(threads_auto_label)
+        threads_row_layout.addStretch(1)
+        program_layout.addLayout(threads_row_layout)
+
+        onnx_mode_row_layout = QHBoxLayout()
+        execution_mode_label = QLabel("Execution mode:")
+        self.execution_mode_dropdown = QComboBox()
+        self.execution_mode_dropdown.addItems(EXECUTION_MODES)
+        graph_optimization_label = QLabel("Graph optimization:")
+        self.graph_optimization_dropdown = QComboBox()
+        self.graph_optimization_dropdown.addItems(GRAPH_OPTIMIZATION_LEVELS)
+
+        onnx_mode_row_layout.addWidget(execution_mode_label)
+        onnx_mode_row_layout.addWidget(self.execution_mode_dropdown)
+        onnx_mode_row_layout.addWidget(graph_optimization_label)
+        onnx_mode_row_layout.addWidget(self.graph_optimization_dropdown)
+        onnx_mode_row_layout.addStretch(1)
+        program_layout.addLayout(onnx_mode_row_layout)
+
+        self.cache_optimized_model_check = QCheckBox("Save the optimized model so later starts skip the optimization")
+        program_layout.addWidget(self.cache_optimized_model_check)
+
+        self.verify_models_online_check = QCheckBox("Check the model files against the download server on every start")
+        program_layout.addWidget(self.verify_models_online_check)
+
+        encoding_settings_label = QLabel("Compressed output (encoded while rendering, pick the format with the output file extension):")
+        program_layout.addWidget(encoding_settings_label)
+
+        bitrate_row_layout = QHBoxLayout()
+        bitrate_mode_label = QLabel("Opus/MP3 bitrate:")
+        self.bitrate_mode_dropdown = QComboBox()
+        self.bitrate_mode_dropdown.addItems(BITRATE_MODES)
+        self.bitrate_spinbox = QSpinBox()
+        self.bitrate_spinbox.setMinimumWidth(60)
+        self.bitrate_spinbox.setRange(*BITRATE_SETTING_RANGE)
+        self.bitrate_spinbox.setSingleStep(8)
+        self.bitrate_spinbox.setSuffix(" kbps")
+        quality_label = QLabel("Quality:")
+        self.quality_spinbox = QSpinBox()
+        self.quality_spinbox.setMinimumWidth(50)
+        self.quality_spinbox.setRange(*QUALITY_RANGE)
+        # The variable mode aims for a quality, the other two for a bitrate
+        self.bitrate_mode_dropdown.currentTextChanged.connect(lambda mode: self.bitrate_spinbox.setEnabled(mode != 'variable'))
+        self.bitrate_mode_dropdown.currentTextChanged.connect(lambda mode: self.quality_spinbox.setEnabled(mode == 'variable'))
+
+        bitrate_row_layout.addWidget(bitrate_mode_label)
+        bitrate_row_layout.addWidget(self.bitrate_mode_dropdown)
+        bitrate_row_layout.addWidget(self.bitrate_spinbox)
+        bitrate_row_layout.addWidget(quality_label)
+        bitrate_row_layout.addWidget(self.quality_spinbox)
+        bitrate_row_layout.addStretch(1)
+        program_layout.addLayout(bitrate_row_layout)
+
+        flac_row_layout = QHBoxLayout()
+        flac_compression_label = QLabel("FLAC compression level:")
+        self.flac_compression_spinbox = QSpinBox()
+        self.flac_compression_spinbox.setMinimumWidth(50)
+        self.flac_compression_spinbox.setRange(0, 8)
+        flac_compression_hint = QLabel("(higher is smaller and slower, the audio is the same)")
+
+        flac_row_layout.addWidget(flac_compression_label)
+        flac_row_layout.addWidget(self.flac_compression_spinbox)
+        flac_row_layout.addWidget(flac_compression_hint)
+        flac_row_layout.addStretch(1)
+        program_layout.addLayout(flac_row_layout)
+
 #### BUTTONS ####
 
         save_button = QPushButton("Save")
@@ -252,6 +406,45 @@ class CustomDialog(QDialog):
         remember_confirmTextModified = settings_manager.get('EDITOR/ConfirmTextModified')
         self.confirmTextModified_check.setChecked(remember_confirmTextModified.lower() == 'true')
 
+        parallel_render = settings_manager.get('TTS/ParallelRender', False)
+        self.parallel_render_check.setChecked(str(parallel_render).lower() == 'true')
+        self.workers_spinbox.setValue(int(settings_manager.get('TTS/RenderWorkers', 0) or 0))
+        fast_start = settings_manager.get('TTS/FastStart', True)
+        self.fast_start_check.setChecked(str(fast_start).lower() == 'true')
+        streaming_playback = settings_manager.get('PLAYER/StreamingPlayback', True)
+        self.streaming_playback_check.setChecked(str(streaming_playback).lower() == 'true')
+        in_memory_chunks = settings_manager.get('TTS/InMemoryChunks', False)
+        self.in_memory_check.setChecked(str(in_memory_chunks).lower() == 'true')
+        incremental_render = settings_manager.get('TTS/IncrementalRender', True)
+        self.incremental_render_check.setChecked(str(incremental_render).lower() == 'true')
+        batch_inference = settings_manager.get('TTS/BatchInference', False)
+        self.batch_inference_check.setChecked(str(batch_inference).lower() == 'true')
+        metrics_log = settings_manager.get('TTS/RenderMetricsLog', False)
+        self.metrics_log_check.setChecked(str(metrics_log).lower() == 'true')
+        synthesis_cache = settings_manager.get('CACHE/SynthesisCache', True)
+        self.synthesis_cache_check.setChecked(str(synthesis_cache).lower() == 'true')
+        self.cache_size_spinbox.setValue(int(settings_manager.get('CACHE/SynthesisCacheMB', 512) or 512))
+        self.cache_size_spinbox.setEnabled(self.synthesis_cache_check.isChecked())
+        self.intra_threads_spinbox.setValue(int(settings_manager.get('ONNX/IntraOpThreads', 0) or 0))
+        self.inter_threads_spinbox.setValue(int(settings_manager.get('ONNX/InterOpThreads', 0) or 0))
+        self.execution_mode_dropdown.setCurrentText(str(settings_manager.get('ONNX/ExecutionMode', 'sequential')))
+        self.graph_optimization_dropdown.setCurrentText(str(settings_manager.get('ONNX/GraphOptimization', 'all')))
+        cache_optimized_model = settings_manager.get('ONNX/CacheOptimizedModel', True)
+        self.cache_optimized_model_check.setChecked(str(cache_optimized_model).lower() == 'true')
+        verify_models_online = settings_manager.get('MODELS/VerifyOnline', False)
+        self.verify_models_online_check.setChecked(str(verify_models_online).lower() == 'true')
+        self.bitrate_mode_dropdown.setCurrentText(str(settings_manager.get('OUTPUT/BitrateMode', 'variable')))
+        self.bitrate_spinbox.setValue(int(settings_manager.get('OUTPUT/Bitrate', 96) or 96))
+        self.quality_spinbox.setValue(int(settings_manager.get('OUTPUT/Quality', 7) or 0))
+        self.flac_compression_spinbox.setValue(int(settings_manager.get('OUTPUT/FlacCompression', 5) or 0))
+        self.bitrate_spinbox.setEnabled(self.bitrate_mode_dropdown.currentText() != 'variable')
+        self.quality_spinbox.setEnabled(self.bitrate_mode_dropdown.currentText() == 'variable')
+        g2p_cache = settings_manager.get('CACHE/G2PCache', True)
+        self.g2p_cache_check.setChecked(str(g2p_cache).lower() == 'true')
+        g2p_cache_persistent = settings_manager.get('CACHE/G2PCachePersistent', False)
+        self.g2p_cache_persistent_check.setChecked(str(g2p_cache_persistent).lower() == 'true')
+        self.g2p_cache_persistent_check.setEnabled(self.g2p_cache_check.isChecked())
+
             
 
     def save_settings(self):
@@ -275,6 +468,28 @@ class CustomDialog(QDialog):
         settings_manager.set('EDITOR/Font', self.font_dropdown.currentText())
         settings_manager.set('EDITOR/FontSize', self.size_spinbox.value())
         settings_manager.set('EDITOR/ConfirmTextModified', remember_confirmTextModified)
+        settings_manager.set('TTS/ParallelRender', self.parallel_render_check.isChecked())
+        settings_manager.set('TTS/RenderWorkers', self.workers_spinbox.value())
+        settings_manager.set('PLAYER/StreamingPlayback', self.streaming_playback_check.isChecked())
+        settings_manager.set('TTS/FastStart', self.fast_start_check.isChecked())
+        settings_manager.set('TTS/InMemoryChunks', self.in_memory_check.isChecked())
+        settings_manager.set('TTS/IncrementalRender', self.incremental_render_check.isChecked())
+        settings_manager.set('TTS/BatchInference', self.batch_inference_check.isChecked())
+        settings_manager.set('TTS/RenderMetricsLog', self.metrics_log_check.isChecked())
+        settings_manager.set('CACHE/SynthesisCache', self.synthesis_cache_check.isChecked())
+        settings_manager.set('CACHE/SynthesisCacheMB', self.cache_size_spinbox.value())
+        settings_manager.set('CACHE/G2PCache', self.g2p_cache_check.isChecked())
+        settings_manager.set('CACHE/G2PCachePersistent', self.g2p_cache_persistent_check.isChecked())
+        settings_manager.set('ONNX/IntraOpThreads', self.intra_threads_spinbox.value())
+        settings_manager.set('ONNX/InterOpThreads', self.inter_threads_spinbox.value())
+        settings_manager.set('ONNX/ExecutionMode', self.execution_mode_dropdown.currentText())
+        settings_manager.set('ONNX/GraphOptimization', self.graph_optimization_dropdown.currentText())
+        settings_manager.set('ONNX/CacheOptimizedModel', self.cache_optimized_model_check.isChecked())
+        settings_manager.set('MODELS/VerifyOnline', self.verify_models_online_check.isChecked())
+        settings_manager.set('OUTPUT/BitrateMode', self.bitrate_mode_dropdown.currentText())
+        settings_manager.set('OUTPUT/Bitrate', self.bitrate_spinbox.value())
+        settings_manager.set('OUTPUT/Quality', self.quality_spinbox.value())
+        settings_manager.set('OUTPUT/FlacCompression', self.flac_compression_spinbox.value())
 
         if new_show_console_value != old_show_console_value:
             # Check if main_window exists and has the method
@@ -0,0 +1,191 @@
+# stream_player.py
+"""
+    Gapless playback of a render while it's still running.
+
+    Chunks arrive as 16-bit mono PCM from the render thread and are appended to a FIFO that a
+    QAudioSink pulls from, so there's no file to open or decoder to set up between chunks and the
+    first chunk plays as soon as it is synthesized. Played audio is dropped from the buffer. The render
+    never waits for playback: once more than MAX_UNPLAYED_BYTES are left unplayed (the player is paused,
+    or the render is far ahead), the player stops taking chunks and picks up from the fused file when the
+    buffer runs out. Once the render is done the player switches to the fused file, which is what
+    seeking works on.
+"""
+import io
+import wave
+import threading
+
+from PyQt6.QtCore import QObject, QIODevice, pyqtSignal
+from PyQt6.QtMultimedia import QAudio, QAudioFormat, QAudioSink, QMediaDevices
+
+SINK_BUFFER_MS = 150 # audio queued in the device; small so playback starts fast, big enough not to crackle
+COMPACT_BYTES = 1 << 20 # drop played audio from the front of the buffer once this much has piled up
+MAX_UNPLAYED_BYTES = 8 * 1024 * 1024 # about three minutes of 24 kHz 16-bit mono
+
+
+def pcm_to_wav(pcm, sample_rate):
+    """WAV bytes of 16-bit mono PCM, for the player's in-memory playlist when streaming isn't possible."""
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return wav_buffer.getvalue()
+
+
+class PcmBuffer(QIODevice):
+    """Sequential read-only device over the PCM received so far; the render thread's chunks go in with append()."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = bytearray()
+        self._read_pos = 0
+        self._lock = threading.Lock()
+
+    def append(self, pcm):
+        with self._lock:
+            self._data.extend(pcm)
+        self.readyRead.emit()
+
+    def available(self):
+        with self._lock:
+            return len(self._data) - self._read_pos
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        return self.available() + super().bytesAvailable()
+
+    def readData(self, maxlen):
+        with self._lock:
+            end = min(self._read_pos + maxlen, len(self._data))
+            end -= (end - self._read_pos) % 2 # whole samples only
+            data = bytes(self._data[self._read_pos:end])
+            self._read_pos = end
+            if self._read_pos >= COMPACT_BYTES:
+                del self._data[:self._read_pos]
+                self._read_pos = 0
+        return data
+
+    def writeData(self, data):
+        return -1
+
+
+class StreamingPlayback(QObject):
+    playing_changed = pyqtSignal(bool)
+    finished = pyqtSignal() # everything was played and no more chunks are coming
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sink = None
+        self.buffer = None
+        self.sample_rate = 0
+        self.bytes_received = 0
+        self.played_usecs = 0 # processedUSecs starts over every time the sink is restarted after an underrun
+        self.volume = 1.0
+        self.ended = False # the render is done, what's in the buffer is all there is
+        self.paused = False
+
+    @property
+    def active(self):
+        return self.sink is not None
+
+    def start(self, sample_rate):
+        """Opens the default output device for sample_rate; returns False if it can't play 16-bit mono PCM."""
+        self.stop()
+        device = QMediaDevices.defaultAudioOutput()
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(sample_rate)
+        audio_format.setChannelCount(1)
+        audio_format.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+        if device.isNull() or not device.isFormatSupported(audio_format):
+            return False
+
+        self.sample_rate = sample_rate
+        self.bytes_received = 0
+        self.played_usecs = 0
+        self.ended = False
+        self.paused = True
+        self.buffer = PcmBuffer(self)
+        self.buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        self.sink = QAudioSink(device, audio_format, self)
+        self.sink.setBufferSize(sample_rate * 2 * SINK_BUFFER_MS // 1000)
+        self.sink.setVolume(self.volume)
+        self.sink.stateChanged.connect(self.on_state_changed)
+        return True
+
+    def has_room(self, size):
+        """False once size more bytes would leave more than MAX_UNPLAYED_BYTES unplayed (a chunk on its own always fits)."""
+        available = self.buffer.available()
+        return available == 0 or available + size <= MAX_UNPLAYED_BYTES
+
+    def feed(self, pcm):
+        self.bytes_received += len(pcm)
+        self.buffer.append(pcm)
+        # An underrun leaves the sink idle, it has to be asked to pull again
+        if not self.paused and self.sink.state() == QAudio.State.IdleState:
+            self._restart()
+
+    def end_of_stream(self):
+        self.ended = True
+        if self.active and not self.paused and self.buffer.available() == 0 and self.sink.state() != QAudio.State.ActiveState:
+            self.finish()
+
+    def play(self):
+        if not self.active:
+            return
+        if self.sink.state() == QAudio.State.SuspendedState:
+            self.sink.resume()
+        elif self.sink.state() != QAudio.State.ActiveState:
+            self._restart()
+        self.paused = False
+        self.playing_changed.emit(True)
+
+    def _restart(self):
+        self.played_usecs += self.sink.processedUSecs()
+        self.sink.start(self.buffer)
+
+    def pause(self):
+        if not self.active:
+            return
+        self.paused = True
+        if self.sink.state() == QAudio.State.ActiveState:
+            self.sink.suspend()
+        self.playing_changed.emit(False)
+
+    def is_playing(self):
+        return self.active and not self.paused
+
+    def stop(self):
+        if self.sink is not None:
+            self.sink.stateChanged.disconnect(self.on_state_changed)
+            self.sink.stop()
+            self.sink.deleteLater()
+            self.sink = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.deleteLater()
+            self.buffer = None
+        self.paused = False
+
+    def finish(self):
+        self.stop()
+        self.playing_changed.emit(False)
+        self.finished.emit()
+
+    def on_state_changed(self, state):
+        # Idle means the buffer ran dry: the end if the render is done, otherwise wait for the next chunk
+        if state == QAudio.State.IdleState and self.ended and self.buffer.available() == 0:
+            self.finish()
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if self.sink is not None:
+            self.sink.setVolume(volume)
+
+    def position_ms(self):
+        return (self.played_usecs + self.sink.processedUSecs()) // 1000 if self.sink is not None else 0
+
+    def duration_ms(self):
+        return self.bytes_received * 1000 // (self.sample_rate * 2) if self.sample_rate else 0
@@ -1,15 +1,21 @@
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtCore import Qt, QSize, pyqtSignal, QThread
 from PyQt6.QtGui import QMovie
 from PyQt6.QtWidgets import QLineEdit, QScrollArea, QFrame, QWidget, QFileDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QDoubleSpinBox, QSlider, QMessageBox, QCheckBox
 
 import os
 import re
 import sys
+import builtins
+import json
 
 
 from core.utils import SettingsManager, OverlayWidget
 from core.signals import global_signals
 from core.tts_render import render_text
+from core.voice_styles import get_voice_style_provider
+from core.renderer import LANGUAGE_MAPPING, phonemize_text
+from core.engine_registry import warm_up
+from core.model_variants import MODEL_VARIANTS, DEFAULT_VARIANT, SAMPLE_TEXT, available_variants, parse_variant_choices, benchmark_variants
 
 from ui.tooltips import ToolTips
 
@@ -18,6 +24,30 @@ from ui.tooltips import ToolTips
 
 settings_manager = SettingsManager()
 
+MODEL_VARIANT_NAMES = {
+    'fp32': "Standard (fp32)",
+    'fp16': "Half precision (fp16)",
+    'int8': "Quantized (int8)",
+}
+
+
+class ModelBenchmarkThread(QThread):
+    benchmark_finished = pyqtSignal(object, str) # results, recommended variant
+
+    def __init__(self, language, voice):
+        super().__init__()
+        self.language = language
+        self.voice = voice
+
+    def run(self):
+        try:
+            sample = SAMPLE_TEXT.get(LANGUAGE_MAPPING.get(self.language, 'en-us'), SAMPLE_TEXT['en-us'])
+            phonemes, is_phonemes = phonemize_text(sample, self.language)
+            results, recommended = benchmark_variants(phonemes, is_phonemes, self.voice, report=global_signals.output_signal.emit)
+        except Exception as e:
+            global_signals.output_signal.emit(f"Model benchmark failed: {e}")
+            results, recommended = [], ""
+        self.benchmark_finished.emit(results, recommended)
 
 
 class TTSPropertiesWindow(QWidget):
@@ -208,6 +238,33 @@ class TTSPropertiesWindow(QWidget):
         voiceLayout.addWidget(self.voicesDropdown)
         settingsLayout.addLayout(voiceLayout)
 
+        ###### MODEL VARIANT DROPDOWN ######
+        modelLayout = QHBoxLayout()
+        modelLayout.setContentsMargins(0, 4, 0, 4)
+        modelLayout.setSpacing(5)
+
+        self.modelLabel = QLabel("Model:")
+        self.modelLabel.setObjectName("ModelLabel")
+        self.modelLabel.setFixedWidth(70)
+
+        self.modelDropdown = QComboBox()
+        self.modelDropdown.setObjectName("ModelDropdown")
+        self.modelDropdown.setEnabled(False)
+        self.modelDropdown.setStyleSheet(self.voicesDropdown.styleSheet())
+        self.populate_model_dropdown()
+        self.modelDropdown.currentIndexChanged.connect(self.onModelVariantChanged)
+
+        self.benchmarkButton = QPushButton("Test")
+        self.benchmarkButton.setToolTip("Time every model on this machine and recommend the fastest one that sounds like the standard model")
+        self.benchmarkButton.setFixedHeight(24)
+        self.benchmarkButton.clicked.connect(self.benchmarkModelsClicked)
+        self.benchmark_thread = None
+
+        modelLayout.addWidget(self.modelLabel)
+        modelLayout.addWidget(self.modelDropdown)
+        modelLayout.addWidget(self.benchmarkButton)
+        settingsLayout.addLayout(modelLayout)
+
         ###### VOICE BLENDING ######
 
         # Blending checkbox layout
@@ -310,6 +367,12 @@ class TTSPropertiesWindow(QWidget):
         self._blending_content_layout.addLayout(self.blendVoiceLayout)
         self._blending_content_layout.addLayout(self.blendRatioLayout)
 
+        # Keep the blend table of the selected pair ready, so blends are instant when the slider moves
+        self.blendingDropdown.currentIndexChanged.connect(self.warm_blend_table)
+        self.voicesDropdown.currentIndexChanged.connect(self.warm_blend_table)
+        self.blending_check.toggled.connect(self.warm_blend_table)
+        self.blendSlider.valueChanged.connect(self.warm_blend)
+
         
 
         # Initially set the visibility based on the checkbox state
@@ -503,6 +566,109 @@ class TTSPropertiesWindow(QWidget):
     def onBlendingCheckToggled(self, checked):
         self._blending_content.setVisible(checked)
 
+    def blend_voice_pair(self):
+        """Returns (voice, 2nd voice) when blending is on and the engine is loaded, else None."""
+        if not self.blending_check.isChecked() or not hasattr(builtins, 'kokoro_instance'):
+            return None
+        voice = self.voicesDropdown.currentData()
+        blend_voice = self.blendingDropdown.currentData()
+        if not voice or not blend_voice:
+            return None
+        return voice, blend_voice
+
+    def warm_blend_table(self, *args):
+        pair = self.blend_voice_pair()
+        if pair:
+            try:
+                get_voice_style_provider(builtins.kokoro_instance).precompute_table(*pair)
+            except Exception as e:
+                global_signals.output_signal.emit(f"Could not precompute voice blends for {pair[0]} and {pair[1]}: {e}")
+
+    def warm_blend(self, value):
+        pair = self.blend_voice_pair()
+        if pair:
+            try:
+                get_voice_style_provider(builtins.kokoro_instance).blend(pair[0], pair[1], value)
+            except Exception as e:
+                global_signals.output_signal.emit(f"Could not blend {pair[0]} and {pair[1]}: {e}")
+
+    ###### MODEL VARIANTS ######
+
+    def populate_model_dropdown(self):
+        on_disk = available_variants()
+        self.modelDropdown.blockSignals(True)
+        self.modelDropdown.clear()
+        for variant in MODEL_VARIANTS:
+            name = MODEL_VARIANT_NAMES.get(variant, variant)
+            if variant not in on_disk:
+                name += " - downloads on next start"
+            self.modelDropdown.addItem(name, userData=variant)
+        self.modelDropdown.blockSignals(False)
+
+    def warm_up_language(self):
+        """Builds the selected language's G2P frontend in the background, so the first render doesn't wait for it."""
+        language = self.languageDropdown.currentText()
+        if language not in LANGUAGE_MAPPING:
+            return
+
+        def on_done(error):
+            if error is not None:
+                global_signals.output_signal.emit(f"Could not load the {language} frontend: {error}")
+            else:
+                global_signals.output_signal.emit(f"{language} frontend loaded.")
+
+        warm_up(LANGUAGE_MAPPING[language], on_done)
+
+    def update_model_dropdown(self):
+        """Shows the variant picked for the current language."""
+        language = self.languageDropdown.currentText()
+        variant = parse_variant_choices(settings_manager.get('TTS/ModelVariants', '{}')).get(language, DEFAULT_VARIANT)
+        self.modelDropdown.blockSignals(True)
+        self.modelDropdown.setCurrentIndex(max(self.modelDropdown.findData(variant), 0))
+        self.modelDropdown.blockSignals(False)
+        self.modelDropdown.setEnabled(bool(language))
+
+    def onModelVariantChanged(self, index):
+        language = self.languageDropdown.currentText()
+        variant = self.modelDropdown.itemData(index)
+        if not language or not variant:
+            return
+        choices = parse_variant_choices(settings_manager.get('TTS/ModelVariants', '{}'))
+        choices[language] = variant
+        settings_manager.set('TTS/ModelVariants', json.dumps(choices))
+
+    def benchmarkModelsClicked(self):
+        language = self.languageDropdown.currentText()
+        voice = self.voicesDropdown.currentData()
+        if not hasattr(builtins, 'kokoro_instance') or not language or not voice:
+            global_signals.output_signal.emit("Model benchmark: select a language and a voice first (and wait for the engine to load).")
+            return
+        if self.benchmark_thread and self.benchmark_thread.isRunning():
+            return
+        self.benchmarkButton.setEnabled(False)
+        global_signals.output_signal.emit(f"Benchmarking the models on the installed variants: {', '.join(available_variants())}...")
+        self.benchmark_thread = ModelBenchmarkThread(language, voice)
+        self.benchmark_thread.benchmark_finished.connect(self.onBenchmarkFinished)
+        self.benchmark_thread.start()
+
+    def onBenchmarkFinished(self, results, recommended):
+        self.benchmarkButton.setEnabled(True)
+        if not results:
+            return
+        lines = [
+            f"{MODEL_VARIANT_NAMES.get(r['variant'], r['variant'])}: real-time factor {r['rtf']:.3f}"
+            + ("" if r['variant'] == DEFAULT_VARIANT else ", not compared (the standard model failed)" if r['duration_diff'] is None
+               else f", {'sounds the same' if r['acceptable'] else 'audibly different'}")
+            for r in results
+        ]
+        box = QMessageBox(self)
+        box.setWindowTitle("Model benchmark")
+        box.setText("\n".join(lines) + f"\n\nRecommended for {self.languageDropdown.currentText()}: {MODEL_VARIANT_NAMES.get(recommended, recommended)}. Use it?")
+        box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        box.setStyleSheet("QPushButton { margin: 0px; }")
+        if box.exec() == QMessageBox.StandardButton.Yes:
+            self.modelDropdown.setCurrentIndex(max(self.modelDropdown.findData(recommended), 0))
+
     def positionLoadingGif(self):
         """ Position the loading GIF over the desired area """
         gif_size = QSize(100, 100)  # Set the size of the GIF
@@ -653,7 +819,7 @@ class TTSPropertiesWindow(QWidget):
         file_dialog = QFileDialog()
         file_dialog.setFileMode(QFileDialog.FileMode.AnyFile)
         file_dialog.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)
-        file_dialog.setNameFilter("Audio files (*.wav *.mp3)")
+        file_dialog.setNameFilter("Audio files (*.wav *.flac *.opus *.ogg *.mp3)")
         file_dialog.setDefaultSuffix("wav")
         file_dialog.selectFile("output.wav")
 
@@ -675,6 +841,8 @@ class TTSPropertiesWindow(QWidget):
 
 
     def update_voices_dropdown(self, index):
+        self.update_model_dropdown()
+        self.warm_up_language()
         current_language_code = self.languageDropdown.itemData(index)
         self.voicesDropdown.clear()
         self.voicesDropdown.setEnabled(True)